@@ -1,18 +1,39 @@
+import os
+import orjson
 import toml
-import time
 from pathlib import Path
 
-from flask import Flask, render_template, jsonify, request, session
+from flask import Flask, Response, render_template, jsonify, request, session
+from flask.json.provider import JSONProvider
 
 from languages.english import English
 from languages.vietnamese import Vietnamese
 from languages.tts import get_tts_manager
 from languages.asr import get_asr_manager
-from languages.model_config import set_vietnamese_asr_model
+from languages.inference_server import InferenceClient
+from languages.model_config import (
+    set_vietnamese_asr_model, set_mms_input_buckets, set_asr_cpu_int8, set_piper_cpu_int8
+)
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider that encodes and decodes with orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Write orjson's bytes straight into the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
 
 
 app = Flask(__name__)
 app.secret_key = 'bun_bo_hue'
+app.json = OrjsonProvider(app)
 
 # Load configuration
 try:
@@ -20,51 +41,49 @@ try:
         config = toml.load(f)
     tts_engine = config.get('tts_engine', 'piper')  # Default to piper if not specified
     vietnamese_asr_model = config.get('vietnamese_asr_model', 'openai/whisper-small')
+    mms_input_buckets = config.get('mms_input_buckets')
+    asr_cpu_int8 = config.get('asr_cpu_int8', True)
+    piper_cpu_int8 = config.get('piper_cpu_int8', True)
+    inference_process = config.get('inference_process', False)
 except FileNotFoundError:
     print("Warning: config.toml not found. Using defaults.")
     tts_engine = 'piper'
     vietnamese_asr_model = 'openai/whisper-small'
+    mms_input_buckets = None
+    asr_cpu_int8 = True
+    piper_cpu_int8 = True
+    inference_process = False
 
 # Apply Vietnamese ASR model configuration
 set_vietnamese_asr_model(vietnamese_asr_model)
 
-# Temporary directory to hold TTS audio files
-TEMP_AUDIO_DIR = Path(app.static_folder) / 'temp_audio'
-TEMP_AUDIO_DIR.mkdir(exist_ok=True)
+# Apply ASR CPU quantization configuration
+set_asr_cpu_int8(asr_cpu_int8)
 
-# Cleanup old audio files on startup
-def cleanup_old_audio_files(max_age_hours=1):
-    """
-    Delete temporary audio files older than max_age_hours.
-    
-    Args:
-        max_age_hours: Maximum age of files to keep (in hours)
-    """
-    if not TEMP_AUDIO_DIR.exists():
-        return
-    
-    current_time = time.time()
-    max_age_seconds = max_age_hours * 3600
-    deleted_count = 0
-    
-    for audio_file in TEMP_AUDIO_DIR.glob('*.wav'):
-        try:
-            file_age = current_time - audio_file.stat().st_mtime
-            if file_age > max_age_seconds:
-                audio_file.unlink()
-                deleted_count += 1
-        except Exception as e:
-            print(f"Warning: Could not delete {audio_file}: {e}")
-    
-    if deleted_count > 0:
-        print(f"Cleaned up {deleted_count} old audio file(s)")
+# Apply Piper CPU quantization configuration
+set_piper_cpu_int8(piper_cpu_int8)
 
-# Run cleanup on startup
-cleanup_old_audio_files()
+# Apply MMS TTS input bucket configuration
+if mms_input_buckets:
+    set_mms_input_buckets(mms_input_buckets)
 
-# Initialize managers (Singletons)
-tts_manager = get_tts_manager(tts_engine=tts_engine, temp_audio_dir=TEMP_AUDIO_DIR)
-asr_manager = get_asr_manager(temp_audio_dir=TEMP_AUDIO_DIR)
+# Temporary directory for audio the models need on disk
+TEMP_AUDIO_DIR = Path(app.static_folder) / 'temp_audio'
+TEMP_AUDIO_DIR.mkdir(exist_ok=True)
+
+# Initialize managers, either in this process (Singletons) or in a separate inference process
+if inference_process:
+    inference_client = InferenceClient(tts_engine, TEMP_AUDIO_DIR, {
+        'vietnamese_asr_model': vietnamese_asr_model,
+        'asr_cpu_int8': asr_cpu_int8,
+        'piper_cpu_int8': piper_cpu_int8,
+        'mms_input_buckets': mms_input_buckets
+    })
+    tts_manager = inference_client.tts
+    asr_manager = inference_client.asr
+else:
+    tts_manager = get_tts_manager(tts_engine, TEMP_AUDIO_DIR)
+    asr_manager = get_asr_manager(temp_audio_dir=TEMP_AUDIO_DIR)
 
 # Language manager
 languages = {
@@ -75,6 +94,24 @@ languages = {
 # Default language
 DEFAULT_LANGUAGE = 'en'
 
+def preload_models():
+    """
+    Load the models for every language up front.
+    
+    Called once in the parent process before serving so forked workers
+    share the (read-only) CPU weights via copy-on-write instead of each
+    loading its own copy on first request.
+    """
+    for lang_code, language in languages.items():
+        try:
+            language.load_models()
+        except Exception as e:
+            print(f'Error preloading models for {lang_code}: {e}')
+
+# Under `gunicorn --preload`, load models before the workers are forked
+if os.environ.get('GUNICORN_PRELOAD'):
+    preload_models()
+
 def get_language(lang_code=None):
     """
     Get language instance for the given code, or from session if not provided.
@@ -111,7 +148,10 @@ def get_sentence():
             return jsonify({'error': f'Failed to load models: {str(e)}'}), 500
     
     sentence = language.get_sentence()
-    return jsonify({'sentence': sentence})
+    return jsonify({
+        'sentence': sentence,
+        'audio_url': language.get_sentence_audio_url(sentence)
+    })
 
 @app.route('/process_audio', methods=['POST'])
 def process_audio():
@@ -148,8 +188,7 @@ def process_audio():
 @app.route('/synthesize_speech', methods=['POST'])
 def synthesize_speech():
     """
-    Receives text, synthesizes speech, saves it as a temporary WAV file,
-    and returns the URL to that file.
+    Receives text, synthesizes speech, and returns it directly as a WAV response.
     """
     language = get_language()
     if not language:
@@ -162,8 +201,8 @@ def synthesize_speech():
         return jsonify({'error': 'No text provided'}), 400
 
     try:
-        audio_url = language.synthesize(text_to_speak)
-        return jsonify({'audio_url': audio_url})
+        wav_bytes = language.synthesize(text_to_speak)
+        return Response(wav_bytes, mimetype='audio/wav')
     except Exception as e:
         print(f'Error synthesizing speech: {e}')
         return jsonify({'error': f'Failed to synthesize speech: {str(e)}'}), 500
@@ -189,6 +228,7 @@ def set_language():
             return jsonify({
                 'message': f'Language set to {lang_code.upper()} and models loaded.',
                 'sentence': sentence,
+                'audio_url': language.get_sentence_audio_url(sentence),
                 'has_asr': language.has_asr,
                 'asr_status': asr_status
             })
@@ -198,4 +238,8 @@ def set_language():
     return jsonify({'error': 'Invalid language selected'}), 400
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    debug = True
+    # With the reloader, only the serving child process should hold the models
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        preload_models()
+    app.run(debug=debug, host='0.0.0.0', port=5000)
\ No newline at end of file
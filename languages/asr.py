@@ -1,12 +1,108 @@
 """
 ASR (Automatic Speech Recognition) Manager for handling speech-to-text models.
+
+torch, torchaudio, transformers and faster-whisper are imported on first use,
+so processes that never run ASR don't pay their import cost.
 """
+from concurrent.futures import Future
+import functools
 from pathlib import Path
-import uuid
-import torch
-import librosa
-from transformers import pipeline
-from .model_config import get_asr_model_name, is_asr_available
+import io
+import os
+import threading
+import time
+import wave
+import numpy as np
+import soundfile
+from .device import cuda_stream, get_device
+from .model_config import get_asr_model_name, is_asr_available, is_asr_cpu_int8_enabled
+
+# Sample rate expected by the ASR models
+ASR_SAMPLE_RATE = 16000
+
+# Initial size of the per-thread decode buffer (60 seconds of 16kHz audio)
+DECODE_BUFFER_SAMPLES = ASR_SAMPLE_RATE * 60
+
+# Longest clip Whisper decodes in a single window (30 seconds of 16kHz audio)
+WHISPER_WINDOW_SAMPLES = ASR_SAMPLE_RATE * 30
+
+# Maximum number of clips transcribed in one batched model call
+ASR_MAX_BATCH_SIZE = 16
+
+# How long the batching worker waits for more requests to join a batch (in seconds)
+ASR_BATCH_WINDOW = 0.02
+
+
+def _faster_whisper_model_size(model_name: str):
+    """
+    Map an OpenAI Whisper model identifier to its faster-whisper size name.
+    
+    Args:
+        model_name: HuggingFace model identifier (e.g., 'openai/whisper-base.en')
+    
+    Returns:
+        faster-whisper model size (e.g., 'base.en'), or None if the model is
+        not an OpenAI Whisper checkpoint
+    """
+    prefix = 'openai/whisper-'
+    if model_name.startswith(prefix):
+        return model_name[len(prefix):]
+    return None
+
+
+class _BatchQueue:
+    """
+    Decoded requests waiting to be batched, kept per language as parallel
+    lists of arrays, futures and enqueue times, so a drained batch is handed
+    to the model without regrouping.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._arrays: dict[str, list[np.ndarray]] = {}
+        self._futures: dict[str, list[Future]] = {}
+        self._enqueue_times: dict[str, list[float]] = {}
+    
+    def put(self, speech_array: np.ndarray, lang_code: str) -> Future:
+        """Queue a clip for transcription and return the future for its text."""
+        future = Future()
+        with self._condition:
+            self._arrays.setdefault(lang_code, []).append(speech_array)
+            self._futures.setdefault(lang_code, []).append(future)
+            self._enqueue_times.setdefault(lang_code, []).append(time.perf_counter())
+            self._condition.notify()
+        return future
+    
+    def take(self, max_size: int, window: float) -> tuple[str, list[np.ndarray], list[Future]]:
+        """
+        Block until a batch is ready and remove it from the queue.
+        
+        A language's batch is ready once it holds max_size clips or its oldest
+        clip has waited for window seconds. The language with the oldest
+        waiting clip is served first.
+        
+        Returns:
+            Tuple of (lang_code, speech_arrays, futures)
+        """
+        with self._condition:
+            while True:
+                if not self._enqueue_times:
+                    self._condition.wait()
+                    continue
+                lang_code = min(self._enqueue_times, key=lambda lang: self._enqueue_times[lang][0])
+                timeout = self._enqueue_times[lang_code][0] + window - time.perf_counter()
+                if len(self._arrays[lang_code]) >= max_size or timeout <= 0:
+                    break
+                self._condition.wait(timeout)
+            
+            speech_arrays = self._arrays[lang_code][:max_size]
+            futures = self._futures[lang_code][:max_size]
+            del self._arrays[lang_code][:max_size]
+            del self._futures[lang_code][:max_size]
+            del self._enqueue_times[lang_code][:max_size]
+            if not self._enqueue_times[lang_code]:
+                del self._arrays[lang_code], self._futures[lang_code], self._enqueue_times[lang_code]
+        return lang_code, speech_arrays, futures
 
 
 class AsrManager:
@@ -23,9 +119,25 @@ class AsrManager:
             temp_audio_dir: Directory for temporary audio file storage
         """
         self.temp_audio_dir = temp_audio_dir
-        self.device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+        # Loaded models keyed by model name, so languages sharing a checkpoint share one copy
         self.models = {}
-        print(f"ASR Manager initialized with device: {self.device}")
+        self._lang_to_key = {}
+        # Serializes model calls; audio decoding runs outside the lock
+        self._inference_lock = threading.Lock()
+        # Per-thread float32 buffers that uploads are decoded into
+        self._decode_buffers = threading.local()
+        # Decoded requests waiting to be batched
+        self._pending = _BatchQueue()
+        self._batch_worker = None
+        # Process the worker runs in; a process forked from it inherits the queue but not the thread
+        self._batch_worker_pid = None
+        self._batch_worker_lock = threading.Lock()
+        print("ASR Manager initialized (device is probed on first model load)")
+    
+    @functools.cached_property
+    def device(self) -> str:
+        """Device the ASR models run on, probed once on first use."""
+        return get_device()
     
     def is_available(self, lang_code: str) -> bool:
         """
@@ -49,19 +161,63 @@ class AsrManager:
         Raises:
             ValueError: If ASR is not available for the language
         """
-        if lang_code in self.models:
+        if lang_code in self._lang_to_key:
             return
         
         if not is_asr_available(lang_code):
             raise ValueError(f"ASR is not available for language: {lang_code}")
         
-        print(f"Loading ASR model for {lang_code}...")
         model_name = get_asr_model_name(lang_code)
-        self.models[lang_code] = pipeline(
-            'automatic-speech-recognition',
-            model=model_name,
-            device=self.device
-        )
+        if model_name in self.models:
+            self._lang_to_key[lang_code] = model_name
+            print(f"ASR model for {lang_code} shares the already loaded {model_name}")
+            return
+        
+        print(f"Loading ASR model for {lang_code}...")
+        model_size = _faster_whisper_model_size(model_name)
+        if model_size is not None:
+            # Each backend is imported only when a model needs it
+            from faster_whisper import WhisperModel
+            
+            # Whisper checkpoints run on CTranslate2 with INT8 weights
+            use_cuda = self.device.startswith('cuda')
+            self.models[model_name] = WhisperModel(
+                model_size,
+                device='cuda' if use_cuda else 'cpu',
+                compute_type='int8_float16' if use_cuda else 'int8'
+            )
+        else:
+            import torch
+            from transformers import pipeline
+            
+            # Other architectures (e.g., wav2vec2) go through the HF pipeline,
+            # in half precision on CUDA and with fused SDPA attention where the
+            # architecture supports it
+            pipeline_kwargs = {
+                'model': model_name,
+                'device': self.device,
+                'torch_dtype': torch.float16 if self.device.startswith('cuda') else torch.float32
+            }
+            try:
+                self.models[model_name] = pipeline(
+                    'automatic-speech-recognition',
+                    model_kwargs={'attn_implementation': 'sdpa'},
+                    **pipeline_kwargs
+                )
+            except ValueError:
+                self.models[model_name] = pipeline('automatic-speech-recognition', **pipeline_kwargs)
+            
+            if self.device == 'cpu' and is_asr_cpu_int8_enabled():
+                # INT8 linear layers halve weight memory traffic and use the CPU's int8 dot products
+                asr_pipeline = self.models[model_name]
+                asr_pipeline.model = torch.ao.quantization.quantize_dynamic(
+                    asr_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+        self._lang_to_key[lang_code] = model_name
+        
+        if self.device.startswith('cuda'):
+            # Pay CUDA kernel selection and allocator warmup before the first user request
+            self._transcribe_arrays([np.zeros(ASR_SAMPLE_RATE, dtype=np.float32)], lang_code)
         print(f"ASR model loaded for {lang_code}")
     
     def transcribe(self, audio_file, lang_code: str) -> str:
@@ -69,7 +225,7 @@ class AsrManager:
         Transcribe audio file to text.
         
         Args:
-            audio_file: File object containing audio data
+            audio_file: File object containing audio data, or path to an audio file
             lang_code: Language code (e.g., 'en', 'vi')
         
         Returns:
@@ -82,24 +238,248 @@ class AsrManager:
         if not is_asr_available(lang_code):
             raise ValueError(f"ASR is not available for language: {lang_code}")
         
-        if lang_code not in self.models:
+        if lang_code not in self._lang_to_key:
             raise RuntimeError(f"ASR model not loaded for {lang_code}. Call load_model() first.")
         
-        # Save uploaded audio to temporary file
-        temp_filename = self.temp_audio_dir / f'temp_upload_{uuid.uuid4().hex}.wav'
-        audio_file.save(temp_filename)
+        # Decode uploaded audio in memory and convert to 16kHz mono
+        speech_array = self._load_audio(audio_file)
         
-        try:
-            # Load audio and convert to 16kHz mono
-            speech_array, _ = librosa.load(temp_filename, sr=16000, mono=True)
+        # Concurrent requests are coalesced into one batched model call
+        return self._submit(speech_array, lang_code).result()
+    
+    def transcribe_batch(self, audio_files: list, lang_code: str) -> list[str]:
+        """
+        Transcribe several audio files to text in batched model calls.
+        
+        Args:
+            audio_files: File objects containing audio data, or paths to audio files
+            lang_code: Language code (e.g., 'en', 'vi')
+        
+        Returns:
+            Transcribed text for each file, in order
+        
+        Raises:
+            ValueError: If ASR is not available for the language
+            RuntimeError: If model is not loaded
+        """
+        if not is_asr_available(lang_code):
+            raise ValueError(f"ASR is not available for language: {lang_code}")
+        
+        if lang_code not in self._lang_to_key:
+            raise RuntimeError(f"ASR model not loaded for {lang_code}. Call load_model() first.")
+        
+        # Each clip needs its own array, so skip the shared decode buffer
+        speech_arrays = [self._load_audio(audio_file, use_buffer=False) for audio_file in audio_files]
+        texts = []
+        for start in range(0, len(speech_arrays), ASR_MAX_BATCH_SIZE):
+            texts.extend(self._transcribe_arrays(speech_arrays[start:start + ASR_MAX_BATCH_SIZE], lang_code))
+        return texts
+    
+    def _submit(self, speech_array: np.ndarray, lang_code: str) -> Future:
+        """
+        Queue decoded audio for the batching worker, starting the worker if needed.
+        
+        A worker started before a fork (e.g., by a transcription in a
+        `gunicorn --preload` parent) does not exist in the forked process, so
+        each process starts its own worker with a fresh queue.
+        """
+        if self._batch_worker_pid != os.getpid():
+            with self._batch_worker_lock:
+                if self._batch_worker_pid != os.getpid():
+                    self._pending = _BatchQueue()
+                    self._batch_worker = threading.Thread(target=self._run_batches, daemon=True)
+                    self._batch_worker.start()
+                    self._batch_worker_pid = os.getpid()
+        
+        return self._pending.put(speech_array, lang_code)
+    
+    def _run_batches(self):
+        """
+        Batching worker loop: transcribe each language's queued requests
+        together once ASR_BATCH_WINDOW has passed or the batch is full.
+        """
+        while True:
+            lang_code, speech_arrays, futures = self._pending.take(ASR_MAX_BATCH_SIZE, ASR_BATCH_WINDOW)
+            try:
+                texts = self._transcribe_arrays(speech_arrays, lang_code)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, text in zip(futures, texts):
+                    future.set_result(text)
+    
+    def _transcribe_arrays(self, speech_arrays: list[np.ndarray], lang_code: str) -> list[str]:
+        """Run the language's ASR model on a batch of 16kHz mono arrays."""
+        from faster_whisper import WhisperModel
+        
+        model = self.models[self._lang_to_key[lang_code]]
+        with self._inference_lock:
+            if isinstance(model, WhisperModel):
+                return self._transcribe_whisper_batch(model, speech_arrays, lang_code)
             
-            # Transcribe using the ASR pipeline
-            result = self.models[lang_code](speech_array)
-            return result['text']
-        finally:
-            # Clean up temporary file
-            if temp_filename.is_file():
-                temp_filename.unlink()
+            import torch
+            # Transcribe using the ASR pipeline, chunking long recordings
+            with cuda_stream('asr'), torch.inference_mode():
+                results = model(
+                    speech_arrays,
+                    batch_size=len(speech_arrays),
+                    chunk_length_s=30,
+                    stride_length_s=5
+                )
+            return [result['text'] for result in results]
+    
+    def _transcribe_whisper_batch(self, model, speech_arrays: list[np.ndarray], lang_code: str) -> list[str]:
+        """
+        Greedy-decode clips that fit in one Whisper window as a single batch.
+        
+        Longer clips go through faster-whisper's regular sliding-window transcription.
+        """
+        from faster_whisper.audio import pad_or_trim
+        from faster_whisper.tokenizer import Tokenizer
+        
+        texts = [None] * len(speech_arrays)
+        short_clips = []
+        for index, speech_array in enumerate(speech_arrays):
+            if len(speech_array) <= WHISPER_WINDOW_SAMPLES:
+                short_clips.append(index)
+            else:
+                segments, _ = model.transcribe(
+                    speech_array,
+                    language=lang_code,
+                    beam_size=1,
+                    vad_filter=False
+                )
+                texts[index] = ''.join(segment.text for segment in segments)
+        
+        if short_clips:
+            tokenizer = Tokenizer(
+                model.hf_tokenizer,
+                model.model.is_multilingual,
+                task='transcribe',
+                language=lang_code
+            )
+            features = np.stack([
+                pad_or_trim(model.feature_extractor(speech_arrays[index])) for index in short_clips
+            ])
+            prompt = list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+            results = model.model.generate(
+                model.encode(features),
+                [prompt] * len(short_clips),
+                beam_size=1
+            )
+            for index, result in zip(short_clips, results):
+                texts[index] = tokenizer.decode(result.sequences_ids[0])
+        return texts
+    
+    def _load_audio(self, audio_file, use_buffer: bool = True) -> np.ndarray:
+        """
+        Decode uploaded audio to a 16kHz mono float32 array.
+        
+        Args:
+            audio_file: File object containing audio data, or path to an audio file
+            use_buffer: Decode into this thread's reusable buffer instead of a new array
+        
+        Returns:
+            Audio samples as a 1-D float32 array
+        """
+        if isinstance(audio_file, (str, Path)):
+            # Decode from the file itself rather than reading it into memory first
+            with open(audio_file, 'rb') as audio_stream:
+                return self._decode_stream(audio_stream, use_buffer)
+        
+        # Decode straight from the upload's stream when there is one (Werkzeug FileStorage)
+        audio_stream = getattr(audio_file, 'stream', None)
+        if audio_stream is None:
+            audio_stream = io.BytesIO(audio_file.read())
+        return self._decode_stream(audio_stream, use_buffer)
+    
+    def _decode_stream(self, audio_stream, use_buffer: bool) -> np.ndarray:
+        """Decode a seekable binary stream of audio to a 16kHz mono float32 array."""
+        speech_array = self._read_pcm16_wav(audio_stream, use_buffer)
+        if speech_array is not None:
+            return speech_array
+        
+        try:
+            sound_file = soundfile.SoundFile(audio_stream)
+        except soundfile.LibsndfileError:
+            # Containers libsndfile can't parse (e.g., browser WebM/Opus recordings)
+            # are decoded and resampled in memory by PyAV
+            from faster_whisper import decode_audio
+            audio_stream.seek(0)
+            return decode_audio(audio_stream, sampling_rate=ASR_SAMPLE_RATE)
+        
+        with sound_file:
+            frames, channels = sound_file.frames, sound_file.channels
+            if use_buffer:
+                buffer = self._decode_buffer(frames * channels)
+            else:
+                buffer = np.empty(frames * channels, dtype=np.float32)
+            if channels > 1:
+                speech_array = sound_file.read(out=buffer[:frames * channels].reshape(frames, channels))
+                speech_array = speech_array.mean(axis=1, dtype=np.float32)
+            else:
+                speech_array = sound_file.read(out=buffer[:frames])
+        
+        if sound_file.samplerate != ASR_SAMPLE_RATE:
+            import torch
+            import torchaudio
+            # Resample on the ASR device; on CUDA this keeps the filter off the CPU.
+            # Audio decoded into the pinned buffer is uploaded asynchronously
+            with cuda_stream('asr'), torch.inference_mode():
+                speech_tensor = torch.from_numpy(speech_array).to(self.device, non_blocking=True)
+                speech_array = torchaudio.functional.resample(
+                    speech_tensor, sound_file.samplerate, ASR_SAMPLE_RATE
+                ).cpu().numpy()
+        return speech_array
+    
+    def _read_pcm16_wav(self, audio_stream, use_buffer: bool) -> np.ndarray | None:
+        """
+        Fast path for the common upload format: 16-bit PCM WAV already at 16kHz mono.
+        
+        The samples are converted to float32 in a single pass with no resampling
+        or mixdown. Any other input rewinds the stream and returns None so the
+        general decoder can handle it.
+        """
+        try:
+            with wave.open(audio_stream, 'rb') as wav_file:
+                if (wav_file.getframerate() != ASR_SAMPLE_RATE or wav_file.getnchannels() != 1
+                        or wav_file.getsampwidth() != 2):
+                    audio_stream.seek(0)
+                    return None
+                data = wav_file.readframes(wav_file.getnframes())
+        except (wave.Error, EOFError):
+            audio_stream.seek(0)
+            return None
+        
+        # A truncated upload can end partway through a sample; drop the partial sample
+        pcm = np.frombuffer(data[:len(data) // 2 * 2], dtype='<i2')
+        
+        if use_buffer:
+            speech_array = self._decode_buffer(pcm.size)[:pcm.size]
+        else:
+            speech_array = np.empty(pcm.size, dtype=np.float32)
+        return np.multiply(pcm, np.float32(1 / 32768), out=speech_array)
+    
+    def _decode_buffer(self, num_samples: int) -> np.ndarray:
+        """
+        Get this thread's decode buffer, growing it if it holds fewer than num_samples.
+        
+        The returned buffer is reused by the next decode on the same thread, so
+        arrays viewing it must be consumed before then. On CUDA it lives in
+        pinned host memory so uploads from it can be copied asynchronously.
+        """
+        buffer = getattr(self._decode_buffers, 'buffer', None)
+        if buffer is None or buffer.size < num_samples:
+            size = max(num_samples, DECODE_BUFFER_SAMPLES)
+            if self.device.startswith('cuda'):
+                import torch
+                # The array keeps the pinned tensor it views alive
+                buffer = torch.empty(size, dtype=torch.float32, pin_memory=True).numpy()
+            else:
+                buffer = np.empty(size, dtype=np.float32)
+            self._decode_buffers.buffer = buffer
+        return buffer
 
 
 # Module-level singleton instance
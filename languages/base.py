@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+from collections import deque
 import random
+import threading
 
 
 class Language(ABC):
@@ -14,7 +16,9 @@ class Language(ABC):
     def __init__(self):
         """Initialize the language with empty sentences and ASR availability flag."""
         self.sentences = []
+        self.sentence_audio_urls = {}  # Precomputed audio for sentences, filled on model load
         self._has_asr = True  # Default to True, subclasses can override
+        self._sentence_bags = threading.local()  # Per-thread shuffled sentences left to hand out
     
     @property
     def has_asr(self) -> bool:
@@ -60,17 +64,38 @@ class Language(ABC):
             text: The text to synthesize
         
         Returns:
-            The URL path to the synthesized audio file
+            The synthesized audio as WAV file bytes
         """
         pass
 
+    def get_sentence_audio_url(self, sentence):
+        """
+        Returns the URL of the precomputed audio for a sentence.
+        
+        Args:
+            sentence: A sentence returned by get_sentence()
+        
+        Returns:
+            URL path to the audio file, or None if it has not been precomputed
+        """
+        return self.sentence_audio_urls.get(sentence)
+
     def get_sentence(self):
         """
         Returns a random sentence for dictation.
         
+        Sentences are dealt from a shuffled pass over the bank, so a thread
+        sees every sentence once before any repeats.
+        
         Returns:
             A sentence string
         """
         if not self.sentences:
             return "No sentences available for this language."
-        return random.choice(self.sentences)
+        bag = getattr(self._sentence_bags, 'bag', None)
+        if not bag:
+            # Shuffle a full pass at a time so each call is just a popleft()
+            shuffled = list(self.sentences)
+            random.shuffle(shuffled)
+            bag = self._sentence_bags.bag = deque(shuffled)
+        return bag.popleft()
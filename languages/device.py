@@ -0,0 +1,64 @@
+"""
+Process-wide device selection and CUDA streams shared by the ASR and TTS managers.
+
+torch is imported on first use, so importing this module stays cheap.
+"""
+import contextlib
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def get_device() -> str:
+    """
+    Get the device the models run on, probing CUDA once per process.
+
+    Returns:
+        'cuda:0' if a CUDA device is available, otherwise 'cpu'
+    """
+    import torch
+    return 'cuda:0' if torch.cuda.is_available() else 'cpu'
+
+
+@functools.lru_cache(maxsize=None)
+def get_cuda_stream(name: str):
+    """
+    Get the CUDA stream dedicated to a manager, creating it on first use.
+
+    Args:
+        name: Name of the stream's owner (e.g., 'asr', 'tts')
+
+    Returns:
+        torch.cuda.Stream, or None when running on CPU
+    """
+    if not get_device().startswith('cuda'):
+        return None
+    import torch
+    return torch.cuda.Stream(device=get_device())
+
+
+@contextlib.contextmanager
+def cuda_stream(name: str):
+    """
+    Run the enclosed torch work on a manager's own CUDA stream.
+
+    Separate streams let ASR and TTS kernels overlap on the GPU instead of
+    queueing behind each other on the default stream. The stream is synchronized
+    on exit, so results are ready to be copied out when the block returns.
+    Does nothing on CPU.
+
+    Args:
+        name: Name of the stream's owner (e.g., 'asr', 'tts')
+    """
+    stream = get_cuda_stream(name)
+    if stream is None:
+        yield
+        return
+
+    import torch
+    # Start only after work already queued on the default stream, such as weight uploads
+    stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(stream):
+        yield
+    done = torch.cuda.Event()
+    done.record(stream)
+    done.synchronize()
@@ -2,7 +2,7 @@ from pathlib import Path
 from .base import Language
 from .tts import TtsManager
 from .asr import AsrManager
-from .utils import ensure_piper_model
+from .utils import ensure_piper_model, read_sentences
 
 
 class English(Language):
@@ -38,9 +38,7 @@ class English(Language):
         """Load sentences from the English sentences file."""
         sentences_file = Path(__file__).parent / 'sentences_en.txt'
         try:
-            with open(sentences_file, 'r', encoding='utf-8') as f:
-                sentences = [line.strip() for line in f if line.strip()]
-            return sentences
+            return list(read_sentences(sentences_file))
         except FileNotFoundError:
             print(f"Warning: {sentences_file} not found. Using default sentences.")
             return [
@@ -70,6 +68,9 @@ class English(Language):
         # Load TTS model
         self.tts_manager.load_voice(self.lang_code)
         
+        # Pre-synthesize the sentence bank so it can be played without a TTS request
+        self.sentence_audio_urls = self.tts_manager.precompute(self.sentences, self.lang_code)
+        
         self.models_loaded = True
         print('English models loaded.')
 
@@ -106,9 +107,9 @@ class English(Language):
             text: Text to synthesize
         
         Returns:
-            URL path to the synthesized audio file
+            WAV file contents of the synthesized audio
         """
         if not self.models_loaded:
             raise RuntimeError("English models not loaded. Call load_models() first.")
         
-        return self.tts_manager.synthesize(text, self.lang_code)
+        return self.tts_manager.synthesize_wav(text, self.lang_code)
@@ -0,0 +1,390 @@
+"""
+Runs the ASR and TTS models in a separate inference process.
+
+Web workers use RemoteAsrManager and RemoteTtsManager, which mirror the
+AsrManager and TtsManager methods the languages call. Decoded audio and
+synthesized WAV files are handed over in shared memory; only their names and
+small metadata go over the connection to the inference process.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import connection, shared_memory
+from pathlib import Path
+from typing import NamedTuple
+import itertools
+import multiprocessing
+import os
+import pickle
+import threading
+import numpy as np
+from .asr import AsrManager
+from .model_config import (
+    is_asr_available, set_asr_cpu_int8, set_mms_input_buckets, set_piper_cpu_int8, set_vietnamese_asr_model
+)
+
+# Requests the inference process works on at once; enough to fill the ASR and TTS batches
+INFERENCE_THREADS = 32
+
+
+class _SharedArray(NamedTuple):
+    """A NumPy array passed in a shared memory block."""
+    name: str
+    shape: tuple
+    dtype: str
+
+
+class _SharedBytes(NamedTuple):
+    """A bytes result passed in a shared memory block."""
+    name: str
+    size: int
+
+
+def _apply_settings(settings: dict):
+    """Apply the web process's model configuration in the inference process."""
+    set_vietnamese_asr_model(settings['vietnamese_asr_model'])
+    set_asr_cpu_int8(settings['asr_cpu_int8'])
+    set_piper_cpu_int8(settings['piper_cpu_int8'])
+    if settings.get('mms_input_buckets'):
+        set_mms_input_buckets(settings['mms_input_buckets'])
+
+
+def _serve(address: str, authkey: bytes, tts_engine: str, temp_audio_dir: Path, settings: dict, ready):
+    """Inference process entry point: own the managers and answer requests from every web worker."""
+    from .asr import get_asr_manager
+    from .tts import get_tts_manager
+
+    _apply_settings(settings)
+    asr_manager = get_asr_manager(temp_audio_dir=temp_audio_dir)
+    tts_manager = get_tts_manager(tts_engine, temp_audio_dir)
+    def transcribe(speech_array: np.ndarray, lang_code: str) -> str:
+        # Loads on demand, since a restarted inference process starts with no models
+        asr_manager.load_model(lang_code)
+        # Requests from all workers meet in the ASR batching queue
+        return asr_manager._submit(speech_array, lang_code).result()
+
+    handlers = {
+        'asr.load_model': asr_manager.load_model,
+        'asr.transcribe': transcribe,
+        'tts.load_voice': tts_manager.load_voice,
+        'tts.synthesize': tts_manager.synthesize,
+        'tts.synthesize_batch': tts_manager.synthesize_batch,
+        'tts.synthesize_wav': tts_manager.synthesize_wav,
+        'tts.precompute': tts_manager.precompute
+    }
+    executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS)
+
+    with connection.Listener(address, family='AF_UNIX', authkey=authkey) as listener:
+        ready.set()
+        print(f"Inference process {os.getpid()} serving on {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (connection.AuthenticationError, EOFError, ConnectionError) as e:
+                # A stray client or a worker killed mid-handshake must not stop the process
+                print(f"Inference process rejected a connection: {type(e).__name__}: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(conn, handlers, executor), daemon=True).start()
+
+
+def _serve_connection(conn: connection.Connection, handlers: dict, executor: ThreadPoolExecutor):
+    """Read one web process's requests and hand each to the executor."""
+    send_lock = threading.Lock()
+
+    def handle(request_id: int, op: str, args: tuple):
+        try:
+            result = handlers[op](*[_import_arg(arg) for arg in args])
+            if isinstance(result, bytes):
+                result = _export_bytes(result)
+            reply = (request_id, True, result)
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = RuntimeError(f"{type(e).__name__}: {e}")
+            reply = (request_id, False, e)
+        with send_lock:
+            conn.send(reply)
+
+    with conn:
+        while True:
+            try:
+                request_id, op, args = conn.recv()
+            except (EOFError, ConnectionError):
+                return
+            executor.submit(handle, request_id, op, args)
+
+
+def _import_arg(arg):
+    """Copy a shared-memory argument out of its block; other arguments pass through."""
+    if not isinstance(arg, _SharedArray):
+        return arg
+    block = shared_memory.SharedMemory(name=arg.name)
+    try:
+        # Copy so the block can be released while the array waits in a batch
+        return np.ndarray(arg.shape, dtype=arg.dtype, buffer=block.buf).copy()
+    finally:
+        block.close()
+
+
+def _export_bytes(data: bytes) -> _SharedBytes:
+    """Place a bytes result in a new shared memory block; the receiver unlinks it."""
+    block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    block.buf[:len(data)] = data
+    block.close()
+    return _SharedBytes(block.name, len(data))
+
+
+def _read_shared_bytes(shared: _SharedBytes) -> bytes:
+    """Take a bytes result out of its shared memory block and free the block."""
+    block = shared_memory.SharedMemory(name=shared.name)
+    try:
+        return bytes(block.buf[:shared.size])
+    finally:
+        block.close()
+        block.unlink()
+
+
+class _Channel:
+    """One web process's connection to the inference process."""
+
+    def __init__(self, address: str, authkey: bytes, on_close):
+        """
+        Connect to the inference process.
+
+        Args:
+            address: Address the inference process listens on
+            authkey: Key authenticating this process to it
+            on_close: Called with this channel once the connection is lost
+        """
+        self.pid = os.getpid()
+        self._conn = connection.Client(address, family='AF_UNIX', authkey=authkey)
+        self._on_close = on_close
+        self._closed = False
+        self._send_lock = threading.Lock()
+        self._futures: dict[int, Future] = {}
+        self._request_ids = itertools.count()
+        threading.Thread(target=self._receive, daemon=True).start()
+
+    def submit(self, op: str, args: tuple) -> Future:
+        """Send a request and return the future for its result."""
+        future = Future()
+        with self._send_lock:
+            if self._closed:
+                raise RuntimeError("Connection to the inference process was closed")
+            request_id = next(self._request_ids)
+            self._futures[request_id] = future
+            self._conn.send((request_id, op, args))
+        return future
+
+    def _receive(self):
+        """Receiver loop: complete each request's future as its reply arrives."""
+        while True:
+            try:
+                request_id, ok, value = self._conn.recv()
+            except (EOFError, ConnectionError):
+                with self._send_lock:
+                    self._closed = True
+                    futures = list(self._futures.values())
+                    self._futures.clear()
+                self._on_close(self)
+                error = RuntimeError("Connection to the inference process was closed")
+                for future in futures:
+                    future.set_exception(error)
+                return
+            future = self._futures.pop(request_id)
+            if not ok:
+                future.set_exception(value)
+            elif isinstance(value, _SharedBytes):
+                future.set_result(_read_shared_bytes(value))
+            else:
+                future.set_result(value)
+
+
+class InferenceClient:
+    """
+    Starts the inference process on first use and sends it requests.
+
+    The process is started with 'spawn', so it gets its own CUDA context.
+    When the first request comes from a parent process that later forks
+    workers (e.g., `gunicorn --preload`), all workers share the one inference
+    process; each opens its own connection to it.
+    """
+
+    def __init__(self, tts_engine: str, temp_audio_dir: Path, settings: dict):
+        """
+        Initialize the inference client.
+
+        Args:
+            tts_engine: TTS engine to use ('piper' or 'mms')
+            temp_audio_dir: Directory for temporary audio file storage
+            settings: Model configuration to apply in the inference process
+                ('vietnamese_asr_model', 'asr_cpu_int8', 'piper_cpu_int8', 'mms_input_buckets')
+        """
+        self.tts_engine = tts_engine
+        self.temp_audio_dir = temp_audio_dir
+        self._settings = settings
+        self._address = connection.arbitrary_address('AF_UNIX')
+        self._authkey = os.urandom(32)
+        self._process = None
+        self._channel = None
+        self._lock = threading.Lock()
+        self.asr = RemoteAsrManager(self, temp_audio_dir)
+        self.tts = RemoteTtsManager(self, tts_engine)
+
+    def _ensure_channel(self) -> _Channel:
+        """
+        Start the inference process if needed and connect this process to it.
+
+        If the inference process has died, the connection is refused and a new
+        inference process is started in its place.
+        """
+        channel = self._channel
+        if channel is not None and channel.pid == os.getpid():
+            return channel
+
+        with self._lock:
+            if self._channel is not None and self._channel.pid == os.getpid():
+                return self._channel
+            if self._process is not None:
+                try:
+                    self._channel = _Channel(self._address, self._authkey, self._drop_channel)
+                    return self._channel
+                except (FileNotFoundError, ConnectionRefusedError):
+                    print("Inference process is gone; starting a new one")
+                    self._process = None
+                    # The dead process may have left its socket file behind
+                    self._address = connection.arbitrary_address('AF_UNIX')
+            self._process = self._start_process()
+            self._channel = _Channel(self._address, self._authkey, self._drop_channel)
+            return self._channel
+
+    def _start_process(self) -> multiprocessing.Process:
+        """Start the inference process and wait until it accepts connections."""
+        context = multiprocessing.get_context('spawn')
+        ready = context.Event()
+        process = context.Process(
+            target=_serve,
+            args=(self._address, self._authkey, self.tts_engine, self.temp_audio_dir, self._settings, ready),
+            daemon=True
+        )
+        process.start()
+        while not ready.wait(timeout=1):
+            if not process.is_alive():
+                raise RuntimeError("Inference process exited during startup")
+        return process
+
+    def _drop_channel(self, channel: _Channel):
+        """Forget a lost connection, so the next request reconnects or restarts the process."""
+        with self._lock:
+            if self._channel is channel:
+                self._channel = None
+
+    def submit(self, op: str, *args) -> Future:
+        """
+        Send a request to the inference process.
+
+        NumPy array arguments are passed in shared memory blocks, which are
+        freed once the request completes.
+
+        Args:
+            op: Operation name (e.g., 'asr.transcribe')
+            *args: Arguments for the operation
+
+        Returns:
+            Future for the operation's result
+        """
+        blocks = []
+        wire_args = []
+        for arg in args:
+            if isinstance(arg, np.ndarray):
+                block = shared_memory.SharedMemory(create=True, size=max(arg.nbytes, 1))
+                np.ndarray(arg.shape, dtype=arg.dtype, buffer=block.buf)[...] = arg
+                blocks.append(block)
+                wire_args.append(_SharedArray(block.name, arg.shape, arg.dtype.str))
+            else:
+                wire_args.append(arg)
+
+        def release(_):
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        future = self._ensure_channel().submit(op, tuple(wire_args))
+        future.add_done_callback(release)
+        return future
+
+    def call(self, op: str, *args):
+        """Send a request to the inference process and wait for its result."""
+        return self.submit(op, *args).result()
+
+
+class RemoteAsrManager(AsrManager):
+    """
+    AsrManager whose models run in the inference process.
+
+    Uploads are still decoded in the web process, so only 16kHz mono samples
+    cross to the inference process.
+    """
+
+    # The GPU belongs to the inference process; decoding and resampling here stay on the CPU
+    device = 'cpu'
+
+    def __init__(self, client: InferenceClient, temp_audio_dir: Path):
+        super().__init__(temp_audio_dir)
+        self._client = client
+        self._loaded = set()
+
+    def load_model(self, lang_code: str) -> None:
+        """Load the ASR model for a given language in the inference process."""
+        if lang_code in self._loaded:
+            return
+        self._client.call('asr.load_model', lang_code)
+        self._loaded.add(lang_code)
+
+    def _check_loaded(self, lang_code: str):
+        """Raise the same errors as AsrManager for unavailable or unloaded languages."""
+        if not is_asr_available(lang_code):
+            raise ValueError(f"ASR is not available for language: {lang_code}")
+        if lang_code not in self._loaded:
+            raise RuntimeError(f"ASR model not loaded for {lang_code}. Call load_model() first.")
+
+    def transcribe(self, audio_file, lang_code: str) -> str:
+        """Transcribe audio file to text in the inference process."""
+        self._check_loaded(lang_code)
+        return self._client.call('asr.transcribe', self._load_audio(audio_file), lang_code)
+
+    def transcribe_batch(self, audio_files: list, lang_code: str) -> list[str]:
+        """Transcribe several audio files, letting the inference process batch them."""
+        self._check_loaded(lang_code)
+        futures = [
+            self._client.submit('asr.transcribe', self._load_audio(audio_file, use_buffer=False), lang_code)
+            for audio_file in audio_files
+        ]
+        return [future.result() for future in futures]
+
+
+class RemoteTtsManager:
+    """TtsManager stand-in whose voices run in the inference process."""
+
+    def __init__(self, client: InferenceClient, tts_engine: str):
+        self.tts_engine = tts_engine
+        self._client = client
+
+    def load_voice(self, lang_code: str):
+        """Loads a voice model for a given language in the inference process."""
+        self._client.call('tts.load_voice', lang_code)
+
+    def synthesize(self, text: str, lang_code: str) -> str:
+        """Synthesizes speech to a file in the inference process and returns its URL path."""
+        return self._client.call('tts.synthesize', text, lang_code)
+
+    def synthesize_batch(self, texts: list[str], lang_code: str) -> list[str]:
+        """Synthesizes several texts to files in the inference process and returns their URL paths."""
+        return self._client.call('tts.synthesize_batch', texts, lang_code)
+
+    def synthesize_wav(self, text: str, lang_code: str) -> bytes:
+        """Synthesizes speech in the inference process and returns the WAV file contents."""
+        return self._client.call('tts.synthesize_wav', text, lang_code)
+
+    def precompute(self, texts: list[str], lang_code: str) -> dict[str, str]:
+        """Synthesizes a fixed set of texts to files in the inference process."""
+        return self._client.call('tts.precompute', texts, lang_code)
@@ -27,6 +27,10 @@ MMS_TTS_MODELS = {
     'vi': 'facebook/mms-tts-vie'
 }
 
+# Token-length buckets that MMS TTS inputs are padded up to, so the model
+# only ever sees a small set of input shapes. Can be overridden via config
+MMS_INPUT_BUCKETS = [16, 32, 64, 128, 256, 512]
+
 # ASR (Automatic Speech Recognition) Model Configuration
 # Note: Vietnamese model can be overridden via config
 ASR_MODELS = {
@@ -40,6 +44,15 @@ ASR_MODELS = {
     }
 }
 
+# Whether ASR models run through the HF pipeline get INT8 dynamic quantization
+# of their linear layers on CPU. Whisper already runs INT8 weights through
+# faster-whisper. Can be overridden via config
+ASR_CPU_INT8 = True
+
+# Whether Piper voices run an INT8-quantized copy of their model on CPU.
+# Can be overridden via config
+PIPER_CPU_INT8 = True
+
 def set_vietnamese_asr_model(model_name: str):
     """
     Set the ASR model for Vietnamese language.
@@ -52,6 +65,72 @@ def set_vietnamese_asr_model(model_name: str):
         ASR_MODELS['vi']['model'] = model_name
         print(f"Vietnamese ASR model set to: {model_name}")
 
+def set_asr_cpu_int8(enabled: bool):
+    """
+    Enable or disable INT8 dynamic quantization of pipeline ASR models on CPU.
+    
+    Args:
+        enabled: True to quantize linear layers to INT8 after loading
+    """
+    global ASR_CPU_INT8
+    ASR_CPU_INT8 = enabled
+    print(f"ASR CPU INT8 quantization set to: {ASR_CPU_INT8}")
+
+def is_asr_cpu_int8_enabled() -> bool:
+    """
+    Check whether pipeline ASR models are quantized to INT8 on CPU.
+    
+    Returns:
+        True if INT8 dynamic quantization is enabled
+    """
+    return ASR_CPU_INT8
+
+def set_piper_cpu_int8(enabled: bool):
+    """
+    Enable or disable the INT8-quantized Piper model on CPU.
+    
+    Args:
+        enabled: True to run Piper voices from their INT8 copy on CPU
+    """
+    global PIPER_CPU_INT8
+    PIPER_CPU_INT8 = enabled
+    print(f"Piper CPU INT8 quantization set to: {PIPER_CPU_INT8}")
+
+def is_piper_cpu_int8_enabled() -> bool:
+    """
+    Check whether Piper voices run their INT8-quantized model on CPU.
+    
+    Returns:
+        True if the INT8 model is used on CPU
+    """
+    return PIPER_CPU_INT8
+
+def set_mms_input_buckets(buckets: list[int]):
+    """
+    Set the token-length buckets used to pad MMS TTS inputs.
+    
+    Args:
+        buckets: Bucket sizes in tokens (e.g., [16, 32, 64])
+    """
+    MMS_INPUT_BUCKETS[:] = sorted(buckets)
+    print(f"MMS TTS input buckets set to: {MMS_INPUT_BUCKETS}")
+
+def get_mms_input_bucket(length: int) -> int:
+    """
+    Get the padded length for an MMS TTS input of the given token length.
+    
+    Args:
+        length: Number of input tokens
+    
+    Returns:
+        Smallest bucket that fits the input, or the length itself if it
+        exceeds the largest bucket
+    """
+    for bucket in MMS_INPUT_BUCKETS:
+        if bucket >= length:
+            return bucket
+    return length
+
 def get_piper_model_path(lang_code: str) -> tuple[Path, Path]:
     """
     Get the paths to the ONNX and JSON files for a Piper model.
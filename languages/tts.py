@@ -1,11 +1,62 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-import torch
+import functools
+import hashlib
+import io
+import itertools
+import os
+import queue
+import threading
+import time
+import numpy as np
 import soundfile
 import wave
-import uuid
-from transformers import VitsTokenizer, VitsModel
+import onnxruntime
 from piper.voice import PiperVoice
-from .model_config import get_piper_model_path, get_mms_model_name
+from .device import cuda_stream, get_device
+from .model_config import (
+    MODELS_DIR, get_piper_model_path, get_mms_model_name, get_mms_input_bucket, is_piper_cpu_int8_enabled
+)
+from .utils import ensure_mms_onnx_model, ensure_piper_fp16_model, ensure_piper_int8_model, model_file_exists
+
+# Maximum number of synthesized sentences kept in the in-memory audio cache
+TTS_CACHE_SIZE = 128
+
+# Maximum number of queued MMS requests synthesized in one batched forward pass
+TTS_MAX_BATCH_SIZE = 8
+
+# How long the batching worker waits for more MMS requests to join a batch (in seconds)
+TTS_BATCH_WINDOW = 0.02
+
+# Number of sentences whose MMS token ids are cached per voice
+MMS_TOKEN_CACHE_SIZE = 1024
+
+# Phoneme-length shape profile (min, opt, max) for Piper TensorRT engines
+PIPER_TRT_PHONEME_PROFILE = (1, 64, 1024)
+
+# Text synthesized once when a voice is loaded to warm it up
+TTS_WARMUP_TEXT = 'a'
+
+# Disk space the persistent audio cache may use before its least recently used files are removed
+TTS_DISK_CACHE_BYTES = 512 * 1024 * 1024
+
+# Number of files the persistent audio cache may hold before its least recently used files are removed
+TTS_DISK_CACHE_FILES = 10000
+
+# Fraction of the disk cache limits a sweep trims it down to, so sweeps stay infrequent
+TTS_DISK_CACHE_LOW_WATER = 0.9
+
+
+def _mms_token_ids(tokenizer, text: str) -> tuple[int, ...]:
+    """
+    Tokenize text with an MMS model's VitsTokenizer.
+
+    VitsTokenizer adds no special tokens, so tokenize() and convert_tokens_to_ids()
+    give the same ids as calling the tokenizer, without building a BatchEncoding,
+    an attention mask and the padding and truncation settings for every text.
+    """
+    return tuple(tokenizer.convert_tokens_to_ids(tokenizer.tokenize(text)))
 
 
 class TtsManager:
@@ -24,30 +75,192 @@ class TtsManager:
         """
         self.tts_engine = tts_engine
         self.temp_audio_dir = temp_audio_dir
-        self.device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
         self.models = {}
-        print(f"TTS Manager initialized with engine: {self.tts_engine}, device: {self.device}")
+        # Maps a hash of (engine, language, text) to its synthesized WAV bytes
+        self._audio_cache: OrderedDict[str, bytes] = OrderedDict()
+        self._audio_cache_lock = threading.Lock()
+        # Bytes and files in the disk cache as last counted by this process, None until first counted
+        self._disk_cache_bytes = None
+        self._disk_cache_count = None
+        self._disk_cache_lock = threading.Lock()
+        # Numbers this process's temporary files; the pid in their names separates worker processes
+        self._temp_file_seq = itertools.count()
+        # MMS requests waiting to be batched, as (text, lang_code, future)
+        self._pending: queue.Queue[tuple[str, str, Future]] = queue.Queue()
+        self._batch_worker = None
+        # Process the worker runs in; a process forked from it inherits the queue but not the thread
+        self._batch_worker_pid = None
+        self._batch_worker_lock = threading.Lock()
+        # Serializes Piper voice calls; MMS calls are serialized by the batching worker
+        self._piper_lock = threading.Lock()
+        # Files written by precompute(), keyed by (lang_code, text)
+        self._precomputed_urls: dict[tuple[str, str], str] = {}
+        # Prepended to file names to form their URL paths; URLs always use '/', whatever os.sep is
+        self._url_prefix = 'static/temp_audio/'
+        print(f"TTS Manager initialized with engine: {self.tts_engine} (device is probed on first voice load)")
+
+    @functools.cached_property
+    def device(self) -> str:
+        """
+        Device the voices run on, probed once on first use.
+
+        Piper runs in ONNX Runtime, so when ONNX Runtime has no CUDA support or
+        CUDA_VISIBLE_DEVICES hides every GPU it is CPU-only and torch is never
+        imported. Otherwise, and for MMS, torch probes for a CUDA device.
+        """
+        if self.tts_engine == 'piper':
+            if 'CUDAExecutionProvider' not in onnxruntime.get_available_providers():
+                return 'cpu'
+            if os.environ.get('CUDA_VISIBLE_DEVICES') in ('', '-1'):
+                return 'cpu'
+        return get_device()
 
     def _load_piper_voice(self, lang_code: str):
         """Load a Piper TTS voice model."""
         onnx_path, json_path = get_piper_model_path(lang_code)
 
-        if not onnx_path.exists() or not json_path.exists():
+        if not model_file_exists(onnx_path) or not model_file_exists(json_path):
             raise FileNotFoundError(
                 f"Model files for {lang_code} not found at {onnx_path}. "
                 "Ensure they are downloaded."
             )
             
         use_cuda = self.device.startswith('cuda')
-        return PiperVoice.load(str(onnx_path), config_path=str(json_path), use_cuda=use_cuda)
+        voice = PiperVoice.load(str(onnx_path), config_path=str(json_path))
+        # PiperVoice.load always builds a default CPU session; swap in a tuned one
+        voice.session = self._create_piper_session(onnx_path, use_cuda)
+        return voice
+
+    def _ort_session_options(self) -> onnxruntime.SessionOptions:
+        """Session options shared by the Piper and MMS ONNX Runtime sessions."""
+        sess_options = onnxruntime.SessionOptions()
+        sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # One sentence is one sequential graph run; parallelize within ops across the physical cores
+        sess_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        sess_options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+        # Keep the pool spinning between ops instead of sleeping and waking for each one
+        sess_options.add_session_config_entry('session.intra_op.allow_spinning', '1')
+        return sess_options
+
+    def _create_piper_session(self, onnx_path: Path, use_cuda: bool) -> onnxruntime.InferenceSession:
+        """
+        Create the ONNX Runtime session for a Piper voice.
+        
+        On CUDA the FP16 copy of the model is used, halving weight traffic, and
+        cuDNN may use its full workspace for faster convolution algorithms.
+        On CPU the INT8 copy is used unless disabled in the configuration.
+        """
+        sess_options = self._ort_session_options()
+        if use_cuda:
+            onnx_path = ensure_piper_fp16_model(onnx_path)
+            cuda_options = {
+                'device_id': int(self.device.partition(':')[2] or 0),
+                # An exhaustive search reruns for every new phoneme length; the heuristic does not
+                'cudnn_conv_algo_search': 'HEURISTIC',
+                'cudnn_conv_use_max_workspace': '1'
+            }
+            providers = [('CUDAExecutionProvider', cuda_options), 'CPUExecutionProvider']
+            if 'TensorrtExecutionProvider' in onnxruntime.get_available_providers():
+                providers.insert(0, ('TensorrtExecutionProvider', self._piper_trt_options()))
+        else:
+            if is_piper_cpu_int8_enabled():
+                onnx_path = ensure_piper_int8_model(onnx_path)
+            providers = ['CPUExecutionProvider']
+        return onnxruntime.InferenceSession(str(onnx_path), sess_options=sess_options, providers=providers)
+
+    def _piper_trt_options(self) -> dict:
+        """
+        TensorRT provider options for Piper voices.
+        
+        Engines are built for a single-utterance phoneme-length profile and
+        cached on disk, so they are only compiled on the first run.
+        """
+        cache_dir = MODELS_DIR / 'trt_cache'
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        shapes = {
+            name: f'input:1x{length},input_lengths:1'
+            for name, length in zip(('min', 'opt', 'max'), PIPER_TRT_PHONEME_PROFILE)
+        }
+        return {
+            'trt_fp16_enable': True,
+            'trt_engine_cache_enable': True,
+            'trt_engine_cache_path': str(cache_dir),
+            'trt_profile_min_shapes': shapes['min'],
+            'trt_profile_opt_shapes': shapes['opt'],
+            'trt_profile_max_shapes': shapes['max']
+        }
 
     def _load_mms_voice(self, lang_code: str):
-        """Load an MMS TTS voice model."""
+        """
+        Load an MMS TTS voice model.
+        
+        On CPU the model is exported to ONNX once and run by ONNX Runtime,
+        falling back to PyTorch if the export fails.
+        """
+        # Imported here rather than at module level, since Piper voices need neither
+        import torch
+        from transformers import VitsModel, VitsTokenizer
+
         model_name = get_mms_model_name(lang_code)
         
         tokenizer = VitsTokenizer.from_pretrained(model_name)
+        # Lives in the voice's entry, so it is freed and rebuilt along with the tokenizer
+        token_ids = functools.lru_cache(maxsize=MMS_TOKEN_CACHE_SIZE)(functools.partial(_mms_token_ids, tokenizer))
         model = VitsModel.from_pretrained(model_name).to(self.device)
-        return {'tokenizer': tokenizer, 'model': model}
+        if not self.device.startswith('cuda'):
+            try:
+                onnx_path = ensure_mms_onnx_model(model, model_name, tokenizer.pad_token_id or 0)
+            except Exception as e:
+                print(f"Warning: ONNX export of {model_name} failed, running it in PyTorch: {e}")
+            else:
+                session = onnxruntime.InferenceSession(
+                    str(onnx_path), sess_options=self._ort_session_options(), providers=['CPUExecutionProvider']
+                )
+                return {
+                    'tokenizer': tokenizer, 'token_ids': token_ids, 'session': session,
+                    'sampling_rate': model.config.sampling_rate
+                }
+        else:
+            # Half-precision weights halve memory traffic with no audible difference
+            model.half()
+            # Fuse kernels to cut launch overhead. The text encoder only ever sees the
+            # bucketed input shapes, so it compiles to a few static graphs; the vocoder's
+            # output length follows the predicted durations, so it is compiled dynamic
+            model.text_encoder = torch.compile(model.text_encoder)
+            model.decoder = torch.compile(model.decoder, dynamic=True)
+        return {
+            'tokenizer': tokenizer, 'token_ids': token_ids, 'model': model,
+            'sampling_rate': model.config.sampling_rate
+        }
+
+    def _tokenize_mms(self, text: str, lang_code: str) -> tuple[int, ...]:
+        """Tokenize text for the MMS model, caching the token ids of repeated sentences."""
+        return self.models[lang_code]['token_ids'](text)
+
+    def _build_mms_inputs(self, texts: list[str], lang_code: str) -> dict:
+        """
+        Build a batch of MMS inputs padded up to the nearest input bucket.
+        
+        Padded positions are masked out, so they get a zero predicted duration
+        and do not change the generated waveforms.
+        """
+        import torch
+
+        token_ids = [self._tokenize_mms(text, lang_code) for text in texts]
+        length = get_mms_input_bucket(max(len(ids) for ids in token_ids))
+        pad_token_id = self.models[lang_code]['tokenizer'].pad_token_id or 0
+
+        # Staging in pinned memory lets the host-to-device copies run asynchronously
+        pin_memory = self.device.startswith('cuda')
+        input_ids = torch.full((len(texts), length), pad_token_id, dtype=torch.long, pin_memory=pin_memory)
+        attention_mask = torch.zeros((len(texts), length), dtype=torch.long, pin_memory=pin_memory)
+        for row, ids in enumerate(token_ids):
+            input_ids[row, :len(ids)] = torch.tensor(ids)
+            attention_mask[row, :len(ids)] = 1
+        return {
+            'input_ids': input_ids.to(self.device, non_blocking=True),
+            'attention_mask': attention_mask.to(self.device, non_blocking=True)
+        }
 
     def load_voice(self, lang_code: str):
         """Loads a voice model for a given language if not already loaded."""
@@ -61,12 +274,28 @@ class TtsManager:
             self.models[lang_code] = self._load_mms_voice(lang_code)
         else:
             raise ValueError(f"Unsupported TTS engine: {self.tts_engine}")
+        self._warmup(lang_code)
         print(f"{lang_code} model loaded.")
 
+    def _warmup(self, lang_code: str):
+        """
+        Synthesize a one-word utterance and discard it, so session setup, kernel
+        selection and compilation happen at load time instead of in the first
+        user request. Bypasses the audio caches.
+        """
+        if self.tts_engine == 'piper':
+            self._synthesize_piper(TTS_WARMUP_TEXT, lang_code)
+        else:
+            self._synthesize_mms_batch([TTS_WARMUP_TEXT], lang_code)
+
     def synthesize(self, text: str, lang_code: str) -> str:
         """
         Synthesize speech and return the URL to the audio file.
         
+        Texts written by precompute() return their existing file. Other texts
+        return their file in the persistent audio cache, which stays valid
+        until the cache evicts it.
+        
         Args:
             text: Text to synthesize
             lang_code: Language code (e.g., 'en', 'vi')
@@ -74,58 +303,322 @@ class TtsManager:
         Returns:
             URL path to the synthesized audio file
         """
+        precomputed_url = self._precomputed_urls.get((lang_code, text))
+        if precomputed_url is not None:
+            return precomputed_url
+
+        cache_key = self._cache_key(text, lang_code)
+        wav_bytes = self._synthesize_cached(cache_key, text, lang_code)
+        cache_path = self._disk_cache_path(cache_key)
+        # A memory cache hit may outlive the evicted file it was read from
+        if not cache_path.exists():
+            self._write_disk_cache(cache_path, wav_bytes)
+        return self._url_prefix + cache_path.name
+
+    def synthesize_batch(self, texts: list[str], lang_code: str) -> list[str]:
+        """
+        Synthesize several texts and return the URL to each audio file.
+        
+        With MMS, texts missing from the caches are synthesized together in
+        padded batches of up to TTS_MAX_BATCH_SIZE. Piper voices synthesize
+        one sentence at a time, so their texts are run in turn.
+        
+        Args:
+            texts: Texts to synthesize
+            lang_code: Language code (e.g., 'en', 'vi')
+        
+        Returns:
+            URL path to the synthesized audio file of each text, in order
+        """
+        if self.tts_engine != 'mms':
+            return [self.synthesize(text, lang_code) for text in texts]
+        
+        # Requests submitted together land in the same window of the MMS batching worker
+        with ThreadPoolExecutor(max_workers=TTS_MAX_BATCH_SIZE) as executor:
+            return list(executor.map(lambda text: self.synthesize(text, lang_code), texts))
+
+    def synthesize_wav(self, text: str, lang_code: str) -> bytes:
+        """
+        Synthesize speech and return it as an in-memory WAV file.
+        
+        Repeated requests for the same text are served from the in-memory
+        audio cache, or from the persistent disk cache across restarts,
+        without running the model.
+        
+        Args:
+            text: Text to synthesize
+            lang_code: Language code (e.g., 'en', 'vi')
+        
+        Returns:
+            WAV file contents
+        """
+        return self._synthesize_cached(self._cache_key(text, lang_code), text, lang_code)
+
+    def _cache_key(self, text: str, lang_code: str) -> str:
+        """Hash the engine, language and text into the key both audio caches use."""
+        return hashlib.blake2b(
+            f'{self.tts_engine}|{lang_code}|{text}'.encode(), digest_size=16
+        ).hexdigest()
+
+    def _synthesize_cached(self, cache_key: str, text: str, lang_code: str) -> bytes:
+        """Look the text up in the memory and disk caches, synthesizing it on a miss."""
+        with self._audio_cache_lock:
+            wav_bytes = self._audio_cache.get(cache_key)
+            if wav_bytes is not None:
+                self._audio_cache.move_to_end(cache_key)
+                return wav_bytes
+
+        wav_bytes = self._read_disk_cache(self._disk_cache_path(cache_key))
+        if wav_bytes is None:
+            if self.tts_engine == 'mms':
+                wav_bytes = self._submit_mms(text, lang_code).result()
+            else:
+                wav_bytes = self._synthesize_piper(text, lang_code)
+            self._write_disk_cache(self._disk_cache_path(cache_key), wav_bytes)
+
+        with self._audio_cache_lock:
+            self._audio_cache[cache_key] = wav_bytes
+            if len(self._audio_cache) > TTS_CACHE_SIZE:
+                self._audio_cache.popitem(last=False)
+        return wav_bytes
+
+    def _disk_cache_path(self, cache_key: str) -> Path:
+        """Path of the persistent cache file for a cache key."""
+        return self.temp_audio_dir / f'tts_cache_{cache_key}.wav'
+
+    def _read_disk_cache(self, cache_path: Path) -> bytes | None:
+        """Read a cached WAV file and mark it recently used, or return None if it is missing."""
+        try:
+            wav_bytes = cache_path.read_bytes()
+            os.utime(cache_path)
+        except FileNotFoundError:
+            # Missing, or evicted by another worker between the read and the touch
+            return None
+        return wav_bytes
+
+    def _write_disk_cache(self, cache_path: Path, wav_bytes: bytes):
+        """Write a WAV file into the disk cache, evicting old files if it grows past its quota."""
+        self._write_atomic(cache_path, wav_bytes)
+
+        with self._disk_cache_lock:
+            if self._disk_cache_bytes is None:
+                entries = self._scan_disk_cache()
+                self._disk_cache_bytes = sum(size for _, size, _ in entries)
+                self._disk_cache_count = len(entries)
+            else:
+                self._disk_cache_bytes += len(wav_bytes)
+                self._disk_cache_count += 1
+            if self._disk_cache_bytes > TTS_DISK_CACHE_BYTES or self._disk_cache_count > TTS_DISK_CACHE_FILES:
+                self._sweep_disk_cache()
+
+    def _write_atomic(self, path: Path, data: bytes):
+        """
+        Write a file under a unique temporary name and rename it into place.
+
+        The static file handler serves these files directly, so it must never
+        see one half-written, whether a crash interrupts the write or another
+        worker writes the same file at the same time.
+        """
+        temp_path = path.with_name(f'{path.name}.{os.getpid()}.{next(self._temp_file_seq)}.tmp')
+        try:
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def _scan_disk_cache(self) -> list[tuple[float, int, Path]]:
+        """
+        List the disk cache files as (last used time, size, path), least recently used first.
+        
+        A file's last use is the later of its modification time, which cache
+        hits bump, and its access time, which static serving of the file updates
+        where the filesystem records it.
+        """
+        entries = []
+        for path in self.temp_audio_dir.glob('tts_cache_*.wav'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Evicted by another worker mid-scan
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def _sweep_disk_cache(self):
+        """Remove least recently used cache files until the cache is under its low-water marks."""
+        entries = self._scan_disk_cache()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        byte_target = TTS_DISK_CACHE_BYTES * TTS_DISK_CACHE_LOW_WATER
+        count_target = TTS_DISK_CACHE_FILES * TTS_DISK_CACHE_LOW_WATER
+        for _, size, path in entries:
+            if total <= byte_target and count <= count_target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            count -= 1
+        self._disk_cache_bytes = total
+        self._disk_cache_count = count
+
+    def precompute(self, texts: list[str], lang_code: str) -> dict[str, str]:
+        """
+        Synthesize the given texts ahead of time and write them to fixed audio files.
+        
+        The files can be served statically, so playing one of these texts
+        needs no synthesis request at all.
+        
+        Args:
+            texts: Texts to synthesize
+            lang_code: Language code (e.g., 'en', 'vi')
+        
+        Returns:
+            Mapping of each text to the URL path of its audio file
+        """
+        audio_urls = {}
+        for index, text in enumerate(texts):
+            output_filename = f'precomputed_{lang_code}_{index}.wav'
+            self._write_atomic(self.temp_audio_dir / output_filename, self.synthesize_wav(text, lang_code))
+            audio_urls[text] = self._url_prefix + output_filename
+            self._precomputed_urls[(lang_code, text)] = audio_urls[text]
+        return audio_urls
+
+    def _synthesize_piper(self, text: str, lang_code: str) -> bytes:
+        """Run the Piper voice for the given text and return the result as WAV bytes."""
         if lang_code not in self.models:
             self.load_voice(lang_code)
 
-        output_filename = f'tts_output_{uuid.uuid4().hex}.wav'
-        output_path = self.temp_audio_dir / output_filename
+        voice = self.models[lang_code]
+        pcm = bytearray()
+        with self._piper_lock:
+            for audio_chunk in voice.synthesize(text):
+                pcm += audio_chunk.audio_int16_bytes
         
-        if self.tts_engine == 'piper':
-            voice = self.models[lang_code]
-            
-            with wave.open(str(output_path), 'wb') as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(voice.config.sample_rate)
-                for audio_chunk in voice.synthesize(text):
-                    wav_file.writeframes(audio_chunk.audio_int16_bytes)
+        # Write the header with the final frame count so the audio goes out in one write
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(voice.config.sample_rate)
+            wav_file.setnframes(len(pcm) // 2)
+            wav_file.writeframesraw(pcm)
+        return buffer.getvalue()
 
-        elif self.tts_engine == 'mms':
-            mms_model = self.models[lang_code]
-            inputs = mms_model['tokenizer'](text, return_tensors='pt').to(self.device)
-            with torch.no_grad():
-                speech = mms_model['model'](**inputs).waveform
-            
-            sampling_rate = mms_model['model'].config.sampling_rate
-            soundfile.write(output_path, speech.cpu().numpy().squeeze(), samplerate=sampling_rate)
+    def _submit_mms(self, text: str, lang_code: str) -> Future:
+        """
+        Queue an MMS request for the batching worker, starting the worker if needed.
+
+        A worker started before a fork (e.g., while precomputing audio under
+        `gunicorn --preload`) does not exist in the forked process, so each
+        process starts its own worker with a fresh queue.
+        """
+        if self._batch_worker_pid != os.getpid():
+            with self._batch_worker_lock:
+                if self._batch_worker_pid != os.getpid():
+                    self._pending = queue.Queue()
+                    self._batch_worker = threading.Thread(target=self._run_mms_batches, daemon=True)
+                    self._batch_worker.start()
+                    self._batch_worker_pid = os.getpid()
+
+        future = Future()
+        self._pending.put((text, lang_code, future))
+        return future
+
+    def _run_mms_batches(self):
+        """
+        Batching worker loop: collect MMS requests that arrive within
+        TTS_BATCH_WINDOW of each other and synthesize them in one forward pass.
+        """
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.perf_counter() + TTS_BATCH_WINDOW
+            while len(batch) < TTS_MAX_BATCH_SIZE:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            requests_by_lang = {}
+            for text, lang_code, future in batch:
+                requests_by_lang.setdefault(lang_code, []).append((text, future))
+
+            for lang_code, requests in requests_by_lang.items():
+                try:
+                    wavs = self._synthesize_mms_batch([text for text, _ in requests], lang_code)
+                except Exception as e:
+                    for _, future in requests:
+                        future.set_exception(e)
+                else:
+                    for (_, future), wav_bytes in zip(requests, wavs):
+                        future.set_result(wav_bytes)
 
-        # Return URL path using Path for consistency
-        return str(Path('static') / 'temp_audio' / output_filename)
+    def _synthesize_mms_batch(self, texts: list[str], lang_code: str) -> list[bytes]:
+        """Run the MMS model on a padded batch of texts and return one WAV file per text."""
+        if lang_code not in self.models:
+            self.load_voice(lang_code)
+
+        mms_model = self.models[lang_code]
+        if 'session' in mms_model:
+            inputs = self._build_mms_inputs(texts, lang_code)
+            waveforms, sequence_lengths = mms_model['session'].run(None, {
+                'input_ids': inputs['input_ids'].numpy(),
+                'attention_mask': inputs['attention_mask'].numpy()
+            })
+            pcm = (np.clip(waveforms, -1, 1) * 32767).astype(np.int16)
+            return self._encode_mms_wavs(pcm, sequence_lengths.tolist(), mms_model['sampling_rate'])
+
+        import torch
 
+        # Autocast keeps mixed-precision ops consistent with the FP16 weights on CUDA
+        use_fp16 = self.device.startswith('cuda')
+        with cuda_stream('tts'):
+            inputs = self._build_mms_inputs(texts, lang_code)
+            with torch.inference_mode(), torch.autocast(self.device.split(':')[0], dtype=torch.float16, enabled=use_fp16):
+                outputs = mms_model['model'](**inputs)
+            # Quantize to 16-bit PCM on the device, so only half the bytes are copied back.
+            # Scale in float32: 32767 rounds to 32768 in FP16, which overflows int16
+            pcm = outputs.waveform.float().clamp(-1, 1).mul(32767).round().to(torch.int16).cpu().numpy()
+            sequence_lengths = outputs.sequence_lengths.tolist()
 
-# Module-level singleton instance
-_tts_manager_instance = None
+        return self._encode_mms_wavs(pcm, sequence_lengths, mms_model['sampling_rate'])
 
+    def _encode_mms_wavs(self, pcm, sequence_lengths: list[int], sampling_rate: int) -> list[bytes]:
+        """Trim each row of a padded int16 batch to its length and encode it as a WAV file."""
+        wavs = []
+        for waveform, length in zip(pcm, sequence_lengths):
+            buffer = io.BytesIO()
+            soundfile.write(buffer, waveform[:length], samplerate=sampling_rate, format='WAV', subtype='PCM_16')
+            wavs.append(buffer.getvalue())
+        return wavs
 
-def get_tts_manager(tts_engine: str = None, temp_audio_dir: Path = None) -> TtsManager:
+
+def get_tts_manager(tts_engine: str, temp_audio_dir: Path) -> TtsManager:
     """
-    Get or create the singleton TTS Manager instance.
-    
+    Get the process-wide TTS Manager for an engine and audio directory, creating it on first use.
+
+    Each (tts_engine, temp_audio_dir) pair gets its own manager, so a caller
+    asking for a different configuration never silently receives another one's
+    instance; repeated calls for the same configuration share its loaded voices,
+    whether the arguments are passed by position or keyword, and whether the
+    directory is given as a str or a Path, relative or absolute.
+
     Args:
-        tts_engine: TTS engine to use (required on first call)
-        temp_audio_dir: Directory for temporary audio files (required on first call)
-    
+        tts_engine: TTS engine to use ('piper' or 'mms')
+        temp_audio_dir: Directory for temporary audio files
+
     Returns:
         TtsManager instance
-    
-    Raises:
-        ValueError: If required parameters are not provided on first call
     """
-    global _tts_manager_instance
-    
-    if _tts_manager_instance is None:
-        if tts_engine is None or temp_audio_dir is None:
-            raise ValueError("tts_engine and temp_audio_dir must be provided on first call")
-        _tts_manager_instance = TtsManager(tts_engine, temp_audio_dir)
-    
-    return _tts_manager_instance
+    return _get_tts_manager(tts_engine, Path(temp_audio_dir).resolve())
+
+
+# Unbounded: a process only ever uses a handful of configurations, and evicting one
+# would make its next call build a second manager while the first is still in use
+@functools.lru_cache(maxsize=None)
+def _get_tts_manager(tts_engine: str, temp_audio_dir: Path) -> TtsManager:
+    """Create the TTS Manager for a normalized configuration; cached per configuration."""
+    return TtsManager(tts_engine, temp_audio_dir)
@@ -1,10 +1,26 @@
 """
-Utility functions for downloading and managing model files.
+Utility functions for downloading and managing model and data files.
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import functools
+import hashlib
+import mmap
+import os
+import threading
 import requests
 from .model_config import PIPER_MODELS, MODELS_DIR
 
+# Size of the chunks downloads are streamed in (1 MiB)
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Relative difference allowed between the exported and PyTorch MMS output lengths,
+# whose durations are sampled; a length frozen by the trace is off by far more
+MMS_ONNX_LENGTH_TOLERANCE = 0.25
+
+# Paths of model files already found on disk
+_existing_model_files: set[str] = set()
+
 
 def download_file(url: str, dest_path: Path):
     """
@@ -18,20 +34,48 @@ def download_file(url: str, dest_path: Path):
         requests.exceptions.RequestException: If download fails
     """
     print(f"Downloading {url} to {dest_path}...")
+    # Download under a temporary name, so an interrupted (preallocated) file is never mistaken for a complete one
+    part_path = dest_path.with_name(f'{dest_path.name}.part')
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        with open(dest_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        print("Download complete.")
+        with requests.get(url, stream=True) as response:
+            response.raise_for_status()
+            with open(part_path, 'wb') as f:
+                total = int(response.headers.get('content-length', 0))
+                if total and hasattr(os, 'posix_fallocate'):
+                    # Reserve the whole file up front so it is laid out contiguously
+                    os.posix_fallocate(f.fileno(), 0, total)
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        part_path.replace(dest_path)
+        print(f"Download of {dest_path.name} complete.")
     except requests.exceptions.RequestException as e:
         print(f"Error downloading {url}: {e}")
-        if dest_path.exists():
-            dest_path.unlink()
+        part_path.unlink(missing_ok=True)
         raise
 
 
+def model_file_exists(path: Path) -> bool:
+    """
+    Check whether a model file exists, statting each file at most once per process.
+
+    Only files that exist are remembered; model files are never deleted while
+    the app runs, while a missing file may still be downloaded.
+
+    Args:
+        path: Path to the model file
+
+    Returns:
+        True if the file exists
+    """
+    key = str(path)
+    if key in _existing_model_files:
+        return True
+    if not os.path.exists(key):
+        return False
+    _existing_model_files.add(key)
+    return True
+
+
 def ensure_piper_model(lang_code: str):
     """
     Ensure that the required Piper TTS model for a language is present.
@@ -52,7 +96,243 @@ def ensure_piper_model(lang_code: str):
     onnx_path = MODELS_DIR / f'{model_name}.onnx'
     json_path = MODELS_DIR / f'{model_name}.onnx.json'
     
-    if not onnx_path.exists():
-        download_file(model_info['onnx'], onnx_path)
-    if not json_path.exists():
-        download_file(model_info['json'], json_path)
+    downloads = [
+        (model_info[key], path) for key, path in (('onnx', onnx_path), ('json', json_path))
+        if not model_file_exists(path)
+    ]
+    if downloads:
+        # Fetch the model and its config concurrently
+        with ThreadPoolExecutor(max_workers=len(downloads)) as executor:
+            for future in [executor.submit(download_file, url, path) for url, path in downloads]:
+                future.result()
+
+
+def ensure_piper_fp16_model(onnx_path: Path) -> Path:
+    """
+    Ensure that a half-precision copy of a Piper ONNX model exists.
+    Converts the model once and caches it next to the original.
+    
+    Args:
+        onnx_path: Path to the FP32 Piper ONNX model
+    
+    Returns:
+        Path to the FP16 ONNX model
+    """
+    fp16_path = onnx_path.with_suffix('.fp16.onnx')
+    if not fp16_path.exists():
+        # Imported here, since only CUDA deployments of Piper convert to FP16
+        import onnx
+        from onnxconverter_common import float16
+
+        print(f"Converting {onnx_path} to FP16...")
+        # Keep float32 inputs/outputs so callers feed and read the same tensors
+        model_fp16 = float16.convert_float_to_float16(onnx.load(str(onnx_path)), keep_io_types=True)
+        # Save under a temporary name so an interrupted conversion isn't picked up later
+        temp_path = _temp_path(fp16_path)
+        try:
+            onnx.save(model_fp16, str(temp_path))
+            temp_path.replace(fp16_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+    return fp16_path
+
+
+def _temp_path(path: Path) -> Path:
+    """Return a temporary path next to path, unique to this process and thread."""
+    return path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+
+def _file_digest(path: Path) -> str:
+    """Return the BLAKE2b hex digest of a file's contents."""
+    return hashlib.blake2b(path.read_bytes()).hexdigest()
+
+
+def ensure_piper_int8_model(onnx_path: Path) -> Path:
+    """
+    Ensure that an optimized INT8 copy of a Piper ONNX model exists.
+    
+    The model is run through ONNX Runtime's quantization pre-processing
+    (shape inference and graph optimization), then its MatMul weights are
+    dynamically quantized to INT8. Convolutions stay FP32, since the vocoder's
+    audio quality depends on them. A sidecar file records the size,
+    modification time and digest of the source model; the source is only
+    hashed when its size or modification time changed, and the conversion
+    reruns only when its digest changed too.
+    
+    Args:
+        onnx_path: Path to the FP32 Piper ONNX model
+    
+    Returns:
+        Path to the INT8 ONNX model
+    """
+    # Imported here, since only CPU deployments of Piper quantize
+    from onnxruntime.quantization import QuantType, quant_pre_process, quantize_dynamic
+
+    int8_path = onnx_path.with_suffix('.int8.onnx')
+    sidecar_path = int8_path.with_name(f'{int8_path.name}.src-blake2b')
+    stat = os.stat(onnx_path)
+    source_stat = f'{stat.st_size} {stat.st_mtime_ns}'
+    if int8_path.exists() and sidecar_path.exists():
+        recorded_stat, _, recorded_digest = sidecar_path.read_text().rpartition(' ')
+        if recorded_stat == source_stat:
+            return int8_path
+        source_digest = _file_digest(onnx_path)
+        if recorded_digest == source_digest:
+            # Touched but unchanged: record the new stat so it isn't hashed again
+            _write_text_atomic(sidecar_path, f'{source_stat} {source_digest}')
+            return int8_path
+    else:
+        source_digest = _file_digest(onnx_path)
+
+    print(f"Optimizing and quantizing {onnx_path} to INT8...")
+    # Unique temporary names, so processes converting the same voice at once don't clobber each other
+    preprocessed_path = _temp_path(onnx_path.with_suffix('.preprocessed.onnx'))
+    temp_path = _temp_path(int8_path)
+    try:
+        quant_pre_process(str(onnx_path), str(preprocessed_path))
+        quantize_dynamic(
+            str(preprocessed_path), str(temp_path),
+            op_types_to_quantize=['MatMul'], weight_type=QuantType.QInt8
+        )
+        temp_path.replace(int8_path)
+    finally:
+        preprocessed_path.unlink(missing_ok=True)
+        temp_path.unlink(missing_ok=True)
+    _write_text_atomic(sidecar_path, f'{source_stat} {source_digest}')
+    return int8_path
+
+
+def _write_text_atomic(path: Path, text: str):
+    """Write a text file under a temporary name and rename it into place."""
+    temp_path = _temp_path(path)
+    temp_path.write_text(text)
+    temp_path.replace(path)
+
+
+def read_sentences(sentences_file: Path) -> tuple[str, ...]:
+    """
+    Read the non-blank lines of a sentences file.
+    The file is mapped and decoded once per version; later calls return the
+    cached tuple until the file's modification time changes.
+    
+    Args:
+        sentences_file: Path to a UTF-8 text file with one sentence per line
+    
+    Returns:
+        Tuple of stripped sentences
+    
+    Raises:
+        FileNotFoundError: If the sentences file does not exist
+    """
+    return _read_sentences(str(sentences_file), os.stat(sentences_file).st_mtime)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_sentences(path: str, mtime: float) -> tuple[str, ...]:
+    """Map and decode a sentences file; mtime is only part of the cache key."""
+    with open(path, 'rb') as f:
+        # mmap can't map an empty file
+        if not f.seek(0, 2):
+            return ()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = mm[:].splitlines()
+    return tuple(line.decode('utf-8').strip() for line in lines if line.strip())
+
+
+def ensure_mms_onnx_model(model, model_name: str, pad_token_id: int) -> Path:
+    """
+    Ensure that an ONNX export of an MMS TTS (VITS) model exists.
+    Exports the model once, with dynamic batch and length axes, and caches it
+    in the models directory.
+    
+    Args:
+        model: Loaded transformers VitsModel on CPU
+        model_name: HuggingFace model identifier (e.g., 'facebook/mms-tts-eng')
+        pad_token_id: Token id the batched inputs are padded with
+    
+    Returns:
+        Path to the ONNX model, whose outputs are the padded waveforms and
+        the length of each one in samples
+    
+    Raises:
+        ValueError: If the export's output length does not follow its input,
+            in which case the model should be run in PyTorch
+    """
+    onnx_path = MODELS_DIR / f"{model_name.replace('/', '--')}.onnx"
+    if onnx_path.exists():
+        return onnx_path
+
+    import torch
+
+    class VitsWaveform(torch.nn.Module):
+        """Expose the waveform and its lengths as plain tensor outputs."""
+
+        def __init__(self, vits_model):
+            super().__init__()
+            self.vits_model = vits_model
+
+        def forward(self, input_ids, attention_mask):
+            outputs = self.vits_model(input_ids=input_ids, attention_mask=attention_mask)
+            return outputs.waveform, outputs.sequence_lengths
+
+    print(f"Exporting {model_name} to ONNX...")
+    MODELS_DIR.mkdir(exist_ok=True)
+    # Trace a padded batch so the masking of padded positions is part of the graph
+    input_ids = torch.randint(1, model.config.vocab_size, (2, 16))
+    attention_mask = torch.ones_like(input_ids)
+    input_ids[1, 8:] = pad_token_id
+    attention_mask[1, 8:] = 0
+    # Export under a unique temporary name so an interrupted export isn't picked up later
+    # and processes exporting the same model at once don't clobber each other
+    temp_path = _temp_path(onnx_path)
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                VitsWaveform(model.eval()),
+                (input_ids, attention_mask),
+                str(temp_path),
+                input_names=['input_ids', 'attention_mask'],
+                output_names=['waveform', 'sequence_lengths'],
+                dynamic_axes={
+                    'input_ids': {0: 'batch', 1: 'tokens'},
+                    'attention_mask': {0: 'batch', 1: 'tokens'},
+                    'waveform': {0: 'batch', 1: 'samples'},
+                    'sequence_lengths': {0: 'batch'}
+                },
+                opset_version=17,
+                dynamo=False
+            )
+        _check_mms_onnx_lengths(temp_path, model)
+        temp_path.replace(onnx_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return onnx_path
+
+
+def _check_mms_onnx_lengths(onnx_path: Path, model):
+    """
+    Check that an exported MMS model still computes its output length from its input.
+
+    The waveform length depends on the predicted durations, which a trace can
+    silently freeze to the traced input's. The export is run on a much longer
+    input than the one traced and its length compared with the PyTorch model's;
+    the durations are sampled, so they only have to agree within a tolerance.
+
+    Raises:
+        ValueError: If the exported model's output length does not follow its input
+    """
+    import numpy as np
+    import onnxruntime
+    import torch
+
+    input_ids = torch.randint(1, model.config.vocab_size, (1, 64))
+    attention_mask = torch.ones_like(input_ids)
+    with torch.no_grad():
+        expected = int(model(input_ids=input_ids, attention_mask=attention_mask).sequence_lengths[0])
+    session = onnxruntime.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+    _, sequence_lengths = session.run(None, {
+        'input_ids': input_ids.numpy(), 'attention_mask': attention_mask.numpy()
+    })
+    actual = int(np.asarray(sequence_lengths)[0])
+    if abs(actual - expected) > expected * MMS_ONNX_LENGTH_TOLERANCE:
+        raise ValueError(f"exported model produced {actual} samples where PyTorch produced {expected}")
@@ -14,6 +14,7 @@ document.addEventListener('DOMContentLoaded', () => {
     let mediaRecorder;
     let audioChunks = [];
     let currentSentence = "";
+    let currentAudioUrl = null; // Precomputed audio for the current sentence, if any
     let hasAsrSupport = true; // Track if current language supports ASR
 
     // --- Event Listeners ---
@@ -26,9 +27,11 @@ document.addEventListener('DOMContentLoaded', () => {
     /**
      * Update the displayed sentence with new text
      * @param {string} sentence - The sentence to display
+     * @param {?string} audioUrl - URL of the precomputed audio for the sentence
      */
-    function updateSentenceDisplay(sentence) {
+    function updateSentenceDisplay(sentence, audioUrl = null) {
         currentSentence = sentence;
+        currentAudioUrl = audioUrl;
         sentenceToDictateEl.textContent = currentSentence;
     }
 
@@ -74,7 +77,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 return;
             }
             const data = await response.json();
-            updateSentenceDisplay(data.sentence);
+            updateSentenceDisplay(data.sentence, data.audio_url);
             clearTranscriptionState();
         } catch (error) {
             console.error("Could not fetch new sentence:", error);
@@ -96,7 +99,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 const data = await response.json();
                 // Display the sentence returned from the language change
                 if (data.sentence) {
-                    updateSentenceDisplay(data.sentence);
+                    updateSentenceDisplay(data.sentence, data.audio_url);
                     clearTranscriptionState();
                 }
                 
@@ -195,6 +198,13 @@ document.addEventListener('DOMContentLoaded', () => {
             alert("Please get a sentence first.");
             return;
         }
+        if (currentAudioUrl) {
+            // Precomputed audio is served statically, no synthesis needed
+            audioPlayerEl.src = currentAudioUrl;
+            audioPlayerEl.classList.remove('d-none');
+            audioPlayerEl.play();
+            return;
+        }
         playCorrectBtn.disabled = true; // Prevent multiple clicks while processing
         playCorrectBtn.textContent = "Generating...";
 
@@ -214,8 +224,11 @@ document.addEventListener('DOMContentLoaded', () => {
                 return;
             }
             
-            const data = await response.json();
-            audioPlayerEl.src = data.audio_url; // Flask serves this from static/temp_audio
+            const audioBlob = await response.blob();
+            if (audioPlayerEl.src.startsWith('blob:')) {
+                URL.revokeObjectURL(audioPlayerEl.src); // Release the previous clip
+            }
+            audioPlayerEl.src = URL.createObjectURL(audioBlob);
             audioPlayerEl.classList.remove('d-none'); // Show player
             audioPlayerEl.play();
         } catch (error) {
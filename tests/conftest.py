@@ -10,7 +10,9 @@ import pytest
 
 from languages.asr import AsrManager
 from languages.tts import TtsManager
-from languages.model_config import set_vietnamese_asr_model
+from languages.model_config import (
+    set_vietnamese_asr_model, set_mms_input_buckets, set_asr_cpu_int8, set_piper_cpu_int8
+)
 
 
 @pytest.fixture(scope='session')
@@ -66,6 +68,14 @@ def tts_manager(config, temp_audio_dir):
     """
     tts_engine = config.get('tts_engine', 'piper')
     
+    # Apply Piper CPU quantization configuration
+    set_piper_cpu_int8(config.get('piper_cpu_int8', True))
+    
+    # Apply MMS TTS input bucket configuration
+    mms_input_buckets = config.get('mms_input_buckets')
+    if mms_input_buckets:
+        set_mms_input_buckets(mms_input_buckets)
+    
     # Create TTS manager
     manager = TtsManager(tts_engine=tts_engine, temp_audio_dir=temp_audio_dir)
     
@@ -88,6 +98,9 @@ def asr_manager(config, temp_audio_dir):
     vietnamese_asr_model = config.get('vietnamese_asr_model', 'openai/whisper-small')
     set_vietnamese_asr_model(vietnamese_asr_model)
     
+    # Apply ASR CPU quantization configuration
+    set_asr_cpu_int8(config.get('asr_cpu_int8', True))
+    
     # Create ASR manager
     manager = AsrManager(temp_audio_dir=temp_audio_dir)
     
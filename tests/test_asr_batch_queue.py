@@ -0,0 +1,112 @@
+"""
+Tests for the ASR Manager's request batching queue.
+
+These exercise batch readiness and language ordering with fake clips and
+short batching windows, so no ASR models are loaded.
+"""
+import threading
+import time
+
+import numpy as np
+
+from languages.asr import _BatchQueue
+
+
+def make_clip(index: int) -> np.ndarray:
+    """
+    Create a fake decoded clip whose single sample identifies it.
+
+    Args:
+        index: Value of the clip's sample
+
+    Returns:
+        One-sample float32 array
+    """
+    return np.full(1, index, dtype=np.float32)
+
+
+def clip_ids(speech_arrays: list[np.ndarray]) -> list[int]:
+    """Return the identifying sample of each clip in a batch."""
+    return [int(speech_array[0]) for speech_array in speech_arrays]
+
+
+class TestAsrBatchQueue:
+    """Test class for ASR request batching."""
+
+    def test_full_batch_is_taken_without_waiting(self):
+        """A language holding max_size clips is ready before its window expires."""
+        batch_queue = _BatchQueue()
+        futures = [batch_queue.put(make_clip(index), 'en') for index in range(2)]
+
+        start = time.perf_counter()
+        lang_code, speech_arrays, batch_futures = batch_queue.take(max_size=2, window=10)
+
+        assert time.perf_counter() - start < 1
+        assert lang_code == 'en'
+        assert clip_ids(speech_arrays) == [0, 1]
+        assert batch_futures == futures
+
+    def test_partial_batch_waits_for_window(self):
+        """A language with fewer than max_size clips is ready once its oldest clip waited the window."""
+        batch_queue = _BatchQueue()
+        batch_queue.put(make_clip(0), 'en')
+
+        start = time.perf_counter()
+        lang_code, speech_arrays, _ = batch_queue.take(max_size=8, window=0.05)
+
+        assert time.perf_counter() - start >= 0.04
+        assert lang_code == 'en'
+        assert clip_ids(speech_arrays) == [0]
+
+    def test_clips_arriving_in_window_join_the_batch(self):
+        """Clips queued while the window is open are taken in the same batch."""
+        batch_queue = _BatchQueue()
+        batch_queue.put(make_clip(0), 'en')
+
+        def put_later():
+            time.sleep(0.02)
+            batch_queue.put(make_clip(1), 'en')
+
+        thread = threading.Thread(target=put_later)
+        thread.start()
+        _, speech_arrays, _ = batch_queue.take(max_size=8, window=0.2)
+        thread.join()
+
+        assert clip_ids(speech_arrays) == [0, 1]
+
+    def test_oversized_backlog_is_split_in_order(self):
+        """A backlog longer than max_size is taken as consecutive batches in arrival order."""
+        batch_queue = _BatchQueue()
+        for index in range(5):
+            batch_queue.put(make_clip(index), 'en')
+
+        batches = [clip_ids(batch_queue.take(max_size=2, window=0)[1]) for _ in range(3)]
+
+        assert batches == [[0, 1], [2, 3], [4]]
+
+    def test_oldest_language_is_served_first(self):
+        """The language whose oldest clip has waited longest is taken first."""
+        batch_queue = _BatchQueue()
+        batch_queue.put(make_clip(0), 'vi')
+        batch_queue.put(make_clip(1), 'en')
+        batch_queue.put(make_clip(2), 'vi')
+
+        first = batch_queue.take(max_size=8, window=0)
+        second = batch_queue.take(max_size=8, window=0)
+
+        assert (first[0], clip_ids(first[1])) == ('vi', [0, 2])
+        assert (second[0], clip_ids(second[1])) == ('en', [1])
+
+    def test_take_blocks_until_a_clip_is_queued(self):
+        """An empty queue blocks take() until another thread puts a clip."""
+        batch_queue = _BatchQueue()
+        timer = threading.Timer(0.05, lambda: batch_queue.put(make_clip(0), 'en'))
+        timer.start()
+
+        start = time.perf_counter()
+        lang_code, speech_arrays, _ = batch_queue.take(max_size=8, window=0)
+        timer.join()
+
+        assert time.perf_counter() - start >= 0.04
+        assert lang_code == 'en'
+        assert clip_ids(speech_arrays) == [0]
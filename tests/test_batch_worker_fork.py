@@ -0,0 +1,68 @@
+"""
+Tests that the ASR and TTS batching workers keep serving after a fork.
+
+Under `gunicorn --preload` a manager can start its batching worker in the
+parent process, whose thread does not survive into the forked workers. The
+model calls are replaced with stubs, so no models are loaded.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from languages.asr import AsrManager
+from languages.tts import TtsManager
+
+# How long a batched request may take before the worker is considered gone (in seconds)
+RESULT_TIMEOUT = 5
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires os.fork")
+
+
+def run_in_fork(check) -> int:
+    """
+    Run a check in a forked child process.
+
+    Args:
+        check: Callable returning True if the child behaved correctly
+
+    Returns:
+        Exit code of the child: 0 if the check passed, 1 otherwise
+    """
+    pid = os.fork()
+    if pid == 0:
+        try:
+            passed = check()
+        except BaseException:
+            passed = False
+        os._exit(0 if passed else 1)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+class TestBatchWorkerFork:
+    """Test class for batching workers in forked processes."""
+
+    def test_asr_worker_serves_forked_child(self, tmp_path):
+        """An ASR request submitted in a child forked after a submit still completes."""
+        manager = AsrManager(temp_audio_dir=tmp_path)
+        manager._transcribe_arrays = lambda speech_arrays, lang_code: ['text'] * len(speech_arrays)
+        clip = np.zeros(1, dtype=np.float32)
+        assert manager._submit(clip, 'en').result(timeout=RESULT_TIMEOUT) == 'text'
+
+        exit_code = run_in_fork(lambda: manager._submit(clip, 'en').result(timeout=RESULT_TIMEOUT) == 'text')
+
+        assert exit_code == 0
+        # The parent's worker keeps serving too
+        assert manager._submit(clip, 'en').result(timeout=RESULT_TIMEOUT) == 'text'
+
+    def test_mms_worker_serves_forked_child(self, tmp_path):
+        """An MMS request submitted in a child forked after a submit still completes."""
+        manager = TtsManager(tts_engine='mms', temp_audio_dir=tmp_path)
+        manager._synthesize_mms_batch = lambda texts, lang_code: [b'wav'] * len(texts)
+        assert manager._submit_mms('a', 'en').result(timeout=RESULT_TIMEOUT) == b'wav'
+
+        exit_code = run_in_fork(lambda: manager._submit_mms('a', 'en').result(timeout=RESULT_TIMEOUT) == b'wav')
+
+        assert exit_code == 0
+        assert manager._submit_mms('a', 'en').result(timeout=RESULT_TIMEOUT) == b'wav'
@@ -7,15 +7,31 @@ This module tests the end-to-end pipeline of:
 3. Comparing the transcription with the original text
 4. Reporting accuracy statistics
 """
-import random
+import difflib
+import functools
+import os
+import re
 import string
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple
 
 import numpy as np
 import pytest
 
+from languages.utils import read_sentences
 
+# Translation table deleting ASCII punctuation
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+
+# Runs of whitespace, collapsed to a single space
+_WS_RE = re.compile(r'\s+')
+
+# Seed of the sentence selection; set TEST_SEED to test a different selection
+_TEST_SEED = int(os.environ.get('TEST_SEED', '0'))
+
+
+@functools.lru_cache(maxsize=4096)
 def normalize_text(text: str) -> str:
     """
     Normalize text for comparison by converting to lowercase and removing punctuation.
@@ -26,17 +42,8 @@ def normalize_text(text: str) -> str:
     Returns:
         Normalized text
     """
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove punctuation
-    translator = str.maketrans('', '', string.punctuation)
-    text = text.translate(translator)
-    
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    
-    return text
+    # Lowercase, remove punctuation, and collapse extra whitespace
+    return _WS_RE.sub(' ', text.lower().translate(_PUNCT_TABLE)).strip()
 
 
 def calculate_word_match_percentage(original: str, transcribed: str) -> float:
@@ -66,20 +73,11 @@ def calculate_word_match_percentage(original: str, transcribed: str) -> float:
     if not transcribed_words:
         return 0.0
     
-    # Count matching words
-    # We'll use a simple approach: count how many words from the original
-    # appear in the transcribed text in the same order
-    matches = 0
-    transcribed_idx = 0
-    
-    for original_word in original_words:
-        # Look for the word in the remaining transcribed words
-        while transcribed_idx < len(transcribed_words):
-            if transcribed_words[transcribed_idx] == original_word:
-                matches += 1
-                transcribed_idx += 1
-                break
-            transcribed_idx += 1
+    # Count matching words: the words from the original that appear in the
+    # transcribed text in the same order. Unlike a greedy scan, a word missing
+    # from the transcription doesn't consume the words after it
+    matcher = difflib.SequenceMatcher(a=original_words, b=transcribed_words, autojunk=False)
+    matches = sum(block.size for block in matcher.get_matching_blocks())
     
     # Calculate percentage based on original word count
     percentage = (matches / len(original_words)) * 100.0
@@ -153,68 +151,58 @@ class TestModelValidation:
             print(f"Warning: Only {len(sentences)} sentences available, testing all of them.")
             num_sentences = len(sentences)
         
-        # Randomly select sentences
-        selected_sentences = random.sample(sentences, num_sentences)
+        # Randomly select sentences, reproducibly for a given TEST_SEED. Each language
+        # gets its own generator, so its selection doesn't depend on which tests ran first
+        rng = np.random.default_rng([_TEST_SEED, *lang_code.encode()])
+        selected_indices = rng.choice(len(sentences), size=num_sentences, replace=False)
+        selected_sentences = [sentences[index] for index in selected_indices]
         
         # Store results
         results: List[Tuple[str, str, float]] = []
         
-        # Test each sentence
-        for idx, sentence in enumerate(selected_sentences, 1):
-            print(f"Test {idx}/{num_sentences}")
-            print(f"{'-'*80}")
-            
-            audio_file_path = None
+        # Step 1: Generate audio for all selected sentences using TTS, in batches
+        audio_path_urls = tts_manager.synthesize_batch(selected_sentences, lang_code)
+        
+        # Convert URL paths to actual file paths
+        # audio_path_url is like 'static/temp_audio/tts_cache_xxx.wav'
+        # But the actual file is in temp_audio_dir
+        audio_file_paths = [temp_audio_dir / Path(audio_path_url).name for audio_path_url in audio_path_urls]
+        
+        # Step 2: Transcribe audio using ASR, which reads each file from its path
+        # All clips are submitted at once so the ASR batching worker can transcribe
+        # them together, while results are scored below in sentence order
+        with ThreadPoolExecutor(max_workers=max(1, num_sentences)) as asr_pool:
+            transcription_futures = [
+                asr_pool.submit(asr_manager.transcribe, audio_file_path, lang_code)
+                for audio_file_path in audio_file_paths
+            ]
             
-            try:
-                # Step 1: Generate audio using TTS
-                print(f"   Original: {sentence}")
-                audio_path_url = tts_manager.synthesize(sentence, lang_code)
-                
-                # Convert URL path to actual file path
-                # audio_path_url is like 'static/temp_audio/tts_output_xxx.wav'
-                # But the actual file is in temp_audio_dir
-                filename = Path(audio_path_url).name
-                audio_file_path = temp_audio_dir / filename
+            # Test each sentence. The audio files belong to the TTS manager's disk cache,
+            # so they are left in place and removed with the session's temporary directory
+            for idx, (sentence, transcription_future) in enumerate(
+                zip(selected_sentences, transcription_futures), 1
+            ):
+                print(f"Test {idx}/{num_sentences}")
+                print(f"{'-'*80}")
                 
-                # Step 2: Transcribe audio using ASR
-                # Create a file-like object that the ASR manager expects
-                class AudioFile:
-                    """Wrapper class to provide a file-like interface for the ASR manager."""
-                    def __init__(self, path):
-                        self.path = Path(path)
+                try:
+                    print(f"   Original: {sentence}")
+                    transcription = transcription_future.result()
+                    print(f"Transcribed: {transcription.strip()}")
                     
-                    def save(self, destination):
-                        """Copy the audio file to the destination."""
-                        import shutil
-                        shutil.copy(self.path, destination)
-                
-                audio_file_obj = AudioFile(audio_file_path)
-                transcription = asr_manager.transcribe(audio_file_obj, lang_code)
-                
-                print(f"Transcribed: {transcription.strip()}")
-                
-                # Step 3: Calculate match percentage
-                match_percentage = calculate_word_match_percentage(sentence, transcription)
-                print(f"      Match: {match_percentage:.2f}%")
-                
-                results.append((sentence, transcription, match_percentage))
+                    # Step 3: Calculate match percentage
+                    match_percentage = calculate_word_match_percentage(sentence, transcription)
+                    print(f"      Match: {match_percentage:.2f}%")
+                    
+                    results.append((sentence, transcription, match_percentage))
+                    
+                except Exception as e:
+                    print(f"Error processing sentence: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    raise
                 
-            except Exception as e:
-                print(f"Error processing sentence: {e}")
-                import traceback
-                traceback.print_exc()
-                raise
-            
-            finally:
-                # Step 4: Clean up temporary files
-                if audio_file_path and audio_file_path.exists():
-                    try:
-                        audio_file_path.unlink()
-                    except Exception as e:
-                        print(f"Warning: Could not delete {audio_file_path}: {e}")
-            
-            print()
+                print()
         
         # Display summary statistics
         self._display_summary(results, lang_code)
@@ -232,9 +220,7 @@ class TestModelValidation:
         sentences_file = Path('languages') / f'sentences_{lang_code}.txt'
         
         try:
-            with open(sentences_file, 'r', encoding='utf-8') as f:
-                sentences = [line.strip() for line in f if line.strip()]
-            return sentences
+            return list(read_sentences(sentences_file))
         except FileNotFoundError:
             pytest.fail(f"Sentences file not found: {sentences_file}")
     
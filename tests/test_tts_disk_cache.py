@@ -0,0 +1,108 @@
+"""
+Tests for the TTS Manager's persistent audio cache.
+
+These exercise the quota, low-water and least-recently-used eviction logic
+with small limits and plain bytes, so no voice models are loaded.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+from languages import tts
+from languages.tts import TtsManager
+
+# Size of each fake cached WAV file (in bytes)
+ENTRY_SIZE = 100
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """
+    Create a TTS manager whose disk cache holds 1000 bytes or 10 files, trimmed to 90%.
+
+    Returns:
+        TtsManager instance caching into tmp_path
+    """
+    monkeypatch.setattr(tts, 'TTS_DISK_CACHE_BYTES', 10 * ENTRY_SIZE)
+    monkeypatch.setattr(tts, 'TTS_DISK_CACHE_FILES', 10)
+    monkeypatch.setattr(tts, 'TTS_DISK_CACHE_LOW_WATER', 0.9)
+    return TtsManager(tts_engine='piper', temp_audio_dir=tmp_path)
+
+
+def write_entry(manager: TtsManager, index: int, last_used: float = None) -> Path:
+    """
+    Write a fake cache entry, optionally backdating its last use.
+
+    Args:
+        manager: TTS manager fixture
+        index: Index used to derive the entry's cache key
+        last_used: Access and modification time to give the file
+
+    Returns:
+        Path to the cache file
+    """
+    cache_path = manager._disk_cache_path(f'{index:04x}')
+    manager._write_disk_cache(cache_path, bytes(ENTRY_SIZE))
+    if last_used is not None:
+        os.utime(cache_path, (last_used, last_used))
+    return cache_path
+
+
+class TestTtsDiskCache:
+    """Test class for the TTS disk cache quota and eviction."""
+
+    def test_under_quota_keeps_every_file(self, manager):
+        """Writes that stay within the quota evict nothing."""
+        paths = [write_entry(manager, index) for index in range(10)]
+
+        assert all(path.exists() for path in paths)
+        assert manager._disk_cache_bytes == 10 * ENTRY_SIZE
+        assert manager._disk_cache_count == 10
+
+    def test_byte_quota_evicts_least_recently_used_to_low_water(self, manager, monkeypatch):
+        """Going over the byte quota removes the oldest files until 90% of it is used."""
+        monkeypatch.setattr(tts, 'TTS_DISK_CACHE_FILES', 100)
+        paths = [write_entry(manager, index, last_used=1000 + index) for index in range(10)]
+        newest = write_entry(manager, 10)
+
+        assert [path.exists() for path in paths] == [False, False] + [True] * 8
+        assert newest.exists()
+        assert manager._disk_cache_bytes == 9 * ENTRY_SIZE
+        assert manager._disk_cache_count == 9
+
+    def test_file_quota_evicts_least_recently_used_to_low_water(self, manager, monkeypatch):
+        """Going over the file quota removes the oldest files until 90% of it is used."""
+        monkeypatch.setattr(tts, 'TTS_DISK_CACHE_BYTES', 100 * ENTRY_SIZE)
+        monkeypatch.setattr(tts, 'TTS_DISK_CACHE_FILES', 4)
+        paths = [write_entry(manager, index, last_used=1000 + index) for index in range(4)]
+        newest = write_entry(manager, 4)
+
+        assert [path.exists() for path in paths] == [False, False, True, True]
+        assert newest.exists()
+        assert manager._disk_cache_count == 3
+
+    def test_cache_hit_marks_file_recently_used(self, manager):
+        """A file read from the cache survives a sweep that evicts files written after it."""
+        paths = [write_entry(manager, index, last_used=1000 + index) for index in range(10)]
+        assert manager._read_disk_cache(paths[0]) == bytes(ENTRY_SIZE)
+        write_entry(manager, 10)
+
+        assert [path.exists() for path in paths] == [True, False, False] + [True] * 7
+
+    def test_sweep_counts_files_removed_by_another_worker(self, manager):
+        """A sweep recounts the directory, so files evicted elsewhere are not evicted again."""
+        paths = [write_entry(manager, index, last_used=1000 + index) for index in range(9)]
+        for path in paths[:5]:
+            path.unlink()
+        write_entry(manager, 9)
+        write_entry(manager, 10)
+
+        # This process counted 11 files, but only 6 remain, which is under the low-water mark
+        assert all(path.exists() for path in paths[5:])
+        assert manager._disk_cache_bytes == 6 * ENTRY_SIZE
+        assert manager._disk_cache_count == 6
+
+    def test_missing_file_is_a_miss(self, manager):
+        """Reading an evicted file returns None instead of raising."""
+        assert manager._read_disk_cache(manager._disk_cache_path('missing')) is None